@@ -0,0 +1,93 @@
+"""
+Compares the streaming game page parser against a full BeautifulSoup parse.
+
+Pass saved pages (e.g. ``curl -o game.html https://play.fancade.com/<id>``) as
+arguments to ``python -m benchmarks.game_page``, run from the repository root.
+
+Without arguments it falls back to the pages in ``benchmarks/pages``. Those are
+synthetic, hand-written to resemble a game page rather than captured from
+Fancade, so their numbers are only indicative. How far the stream parser gets
+ahead depends on where the wanted tags sit in the real page.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from bs4 import BeautifulSoup, Tag
+
+from cogs.utils.fancade import GamePageParser, PAGE_CHUNK_SIZE
+
+
+ROUNDS = 200
+
+PAGES_DIR = Path(__file__).parent / "pages"
+
+
+def parse_with_soup(page: bytes) -> dict[str, Any]:
+    doc = BeautifulSoup(page.decode("utf-8"), "html.parser")
+
+    title = doc.find("title")
+    title = title.get_text(strip=True) if isinstance(title, Tag) else None
+
+    author = doc.find("p", class_="author")
+    author = author.get_text(strip=True) if isinstance(author, Tag) else None
+
+    image_url = doc.find("meta", attrs={"property": "og:image"})
+    description = doc.find("meta", attrs={"name": "description"})
+
+    assert isinstance(image_url, Tag)
+    assert isinstance(description, Tag)
+
+    return {"title": title, "image_url": image_url.attrs["content"], "description": description.attrs["content"], "author": author}
+
+
+def parse_with_stream(page: bytes) -> dict[str, Any]:
+    parser = GamePageParser()
+    for start in range(0, len(page), PAGE_CHUNK_SIZE):
+        if parser.feed_chunk(page[start:start + PAGE_CHUNK_SIZE]):
+            break
+
+    parser.close()
+    return parser.to_dict()
+
+
+def measure(func: Callable[[bytes], dict[str, Any]], page: bytes) -> tuple[float, int]:
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        func(page)
+    cpu_time = (time.process_time() - start) / ROUNDS
+
+    tracemalloc.start()
+    func(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return cpu_time, peak
+
+
+def main(paths: list[str]) -> None:
+    if not paths:
+        paths = sorted(str(path) for path in PAGES_DIR.glob("*.html"))
+
+    print(f"{'page':<30} {'parser':<8} {'cpu/parse':>12} {'peak mem':>12}")
+    for path in paths:
+        page = Path(path).read_bytes()
+
+        soup_result = parse_with_soup(page)
+        stream_result = parse_with_stream(page)
+        if soup_result != stream_result:
+            print(f"{path}: results differ\n  soup:   {soup_result}\n  stream: {stream_result}")
+
+        for name, func in (("soup", parse_with_soup), ("stream", parse_with_stream)):
+            cpu_time, peak = measure(func, page)
+            print(f"{Path(path).name:<30} {name:<8} {cpu_time * 1000:>10.3f}ms {peak / 1024:>10.1f}KB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
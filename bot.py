@@ -26,15 +26,23 @@ import logging
 from typing import Any
 from pathlib import Path
 from typing import Literal, Optional
+from functools import partial
 from traceback import print_tb
 
+import aiohttp
 import discord
-import asyncpg
 from discord.ext import commands
 from discord import app_commands
 
-from cogs.poll import PollView
+from cogs.poll import PollView, update_poll_message
 from cogs.utils import Context
+from cogs.utils.aio import Debouncer
+from cogs.utils.cache import DiskCache
+from cogs.utils.fancade import FancadeClient
+from cogs.utils.migrations import migrate
+from cogs.utils.database import Database
+from cogs.utils.votes import VoteBuffer
+from cogs.utils.polls import PollCache, group_polls
 from cogs.utils.embed import create_embed_with_author
 
 __all__ = (
@@ -45,6 +53,15 @@ REPORT_CHANNEL_ID = 1020388867506962542
 REPORT_GUILD_ID = 758487559399145524
 OWNER_IDS = [353774678826811403]
 
+# outbound http
+HTTP_POOL_LIMIT = 20
+HTTP_POOL_LIMIT_PER_HOST = 10
+HTTP_DNS_CACHE_TTL = 300
+HTTP_KEEPALIVE_TIMEOUT = 30
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3, sock_read=5)
+HTTP_CACHE_PATH = ".cache/fancade.sqlite3"
+HTTP_CACHE_MAX_ENTRIES = 10_000
+
 
 class ReportUserModal(discord.ui.Modal):
 
@@ -132,6 +149,8 @@ class OddBot(commands.Bot):
 
     # built-in events and methods
     async def setup_hook(self) -> None:
+        await self.create_session()
+
         for cog in self._cogs:
             await self.load_extension(f"cogs.{cog}")
             self.log.info(f"Extension '{cog}' has been loaded.")
@@ -153,57 +172,57 @@ class OddBot(commands.Bot):
     async def on_disconnect(self) -> None:
         self.log.critical("Bot has disconnected!")
 
+    async def close(self) -> None:
+        await super().close()
+        if hasattr(self, "session"):
+            await self.session.close()
+            self.http_cache.close()
+
+        if hasattr(self, "poll_updates"):
+            self.poll_updates.close()
+
+        if hasattr(self, "votes"):
+            await self.votes.close()  # the last buffered votes still need the pool
+
+        if hasattr(self, "db"):
+            await self.db.close()
+
+    async def create_session(self) -> None:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT)
+        self.http_cache = DiskCache(self.config.get("http_cache_path", HTTP_CACHE_PATH), HTTP_CACHE_MAX_ENTRIES)
+        self.fancade = FancadeClient(self.session, disk_cache=self.http_cache)
+
     async def create_pool(self) -> None:
-        pool = await asyncpg.create_pool(dsn=self.config["supabase_url"])
-        assert pool
-        async with pool.acquire() as connection:
-            query = """
-            CREATE TABLE IF NOT EXISTS submission (
-                id SERIAL PRIMARY KEY,
-                author_id BIGINT,
-                guild_id BIGINT,
-                game_title TEXT,
-                game_url TEXT
-            );
-
-            CREATE TABLE IF NOT EXISTS poll (
-                id SERIAL PRIMARY KEY,
-                message_id BIGINT,
-                channel_id BIGINT,
-                deadline INTEGER
-            );
-
-            CREATE TABLE IF NOT EXISTS poll_options (
-                id SERIAL PRIMARY KEY,
-                poll_id INTEGER REFERENCES poll(id) ON DELETE CASCADE,
-                option_emoji VARCHAR(100) NOT NULL,
-                option_text VARCHAR(100) NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS poll_votes (
-                id SERIAL PRIMARY KEY,
-                member_id BIGINT,
-                poll_id INTEGER REFERENCES poll(id) ON DELETE CASCADE,
-                option_id INTEGER REFERENCES poll_options(id) ON DELETE CASCADE,
-                UNIQUE (member_id, poll_id)
-            );
-            """
-            await connection.execute(query)
-
-        self.pool = pool
+        self.db = await Database.create(
+            self.config["supabase_url"],
+            min_size=self.config.get("database_pool_min_size", 2),
+            max_size=self.config.get("database_pool_max_size", 10),
+            timeouts=self.config.get("database_timeouts")
+        )
+        self.pool = self.db.pool
+
+        applied = await migrate(self.pool, log=self.log)
+        if applied:
+            self.log.info(f"Database migrated to version {applied[-1].version}.")
+
+        self.votes = VoteBuffer(self.db, self.config.get("vote_flush_interval", 0.25), log=self.log)
+        self.votes.start()
+        self.polls = PollCache(self.db.fetch_poll)
+        self.poll_updates: Debouncer[int, discord.Message] = Debouncer(
+            partial(update_poll_message, self),
+            self.config.get("poll_update_interval", 5.0)
+        )
 
     async def add_persistent_views(self) -> None:
-        async with self.pool.acquire() as connection:
-            options = await connection.fetch(
-                """
-                SELECT poll_id, ARRAY_AGG(option_emoji) as option_emoji, ARRAY_AGG(option_text) as option_text
-                FROM poll_options
-                GROUP BY poll_id;
-                """
-            )
-            for _, option_emojis, option_texts in options:
-                options_dict = {emoji: text for emoji, text in zip(option_emojis, option_texts)}
-                self.add_view(PollView(self, options_dict))
+        for poll in group_polls(await self.db.fetch_polls()):
+            self.polls.add(poll)
+            self.add_view(PollView(self, poll.view_options))
         
 
 # ungrouped commands
@@ -13,7 +13,9 @@ __all__ = (
     "SubmissionAlreadyExists",
     "SubmissionNotInDatabase",
     "NoSubmissionError",
-    "GameNotFoundError"
+    "GameNotFoundError",
+    "FancadeUnavailableError",
+    "TooManySubmissionsError"
 )
 
 
@@ -43,4 +45,17 @@ class GameNotFoundError(CustomMessageError):
 
     def __init__(self, message: Optional[str] = None) -> None:
         super().__init__(message or "Game doesn't exist.")
-        
\ No newline at end of file
+
+
+class FancadeUnavailableError(CustomMessageError):
+    """An exception raised when Fancade can't be reached."""
+
+    def __init__(self, message: Optional[str] = None) -> None:
+        super().__init__(message or "Fancade isn't responding right now, please try again later.")
+
+
+class TooManySubmissionsError(CustomMessageError):
+    """An exception raised when too many games are submitted at once."""
+
+    def __init__(self, message: Optional[str] = None) -> None:
+        super().__init__(message or "Too many submissions.")
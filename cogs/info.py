@@ -121,28 +121,11 @@ class Info(commands.Cog):
         python_version = sys.version[:7]
         discord_version = discord.__version__
 
-        async with self.bot.pool.acquire() as connection:
-            database_version = await connection.fetchval("SELECT version();")
-            assert database_version
-
-            database_uptime = await connection.fetchval(
-                "SELECT extract(epoch FROM now() - pg_postmaster_start_time())::integer AS uptime;"
-            )
-            assert database_uptime
-
-            database_size = await connection.fetchval("SELECT pg_size_pretty(pg_database_size(current_database()));")
-            assert database_size
-
-            active_connections = await connection.fetchval(
-                """
-                SELECT active_connections FROM (
-                    SELECT count(pid) AS active_connections
-                    FROM pg_stat_activity
-                    WHERE state = 'active'
-                ) active_connections;
-                """
-            )
-            assert active_connections
+        database_info = await self.bot.db.database_info()
+        database_version = database_info["version"]
+        database_uptime = database_info["uptime"]
+        database_size = database_info["size"]
+        active_connections = database_info["active_connections"]
 
         bot_uptime = discord.utils.format_dt(self.bot.uptime, style="R")
         database_uptime = discord.utils.format_dt(
@@ -169,6 +152,18 @@ class Info(commands.Cog):
             value=f"• **Size:** {database_size}\n• **Active Connections:** {active_connections}"
         )
 
+        cache_stats = self.bot.fancade.cache.stats
+        inflight_stats = self.bot.fancade.inflight.stats
+        embed.add_field(
+            name="Game Cache:",
+            value=(
+                f"• **Size:** {cache_stats['size']}\n• **Hits/Misses:** {cache_stats['hits']}/{cache_stats['misses']}\n"
+                f"• **Evictions:** {cache_stats['evictions']}\n• **Fetches/Coalesced:** {inflight_stats['calls']}/{inflight_stats['coalesced']}\n"
+                f"• **Fancade:** {self.bot.fancade.breaker.state} ({self.bot.fancade.limiter.rate:.1f} req/s)"
+            ),
+            inline=False
+        )
+
         embed.add_field(
             name="Latency:",
             value=f"• **Websocket:** {round(self.bot.latency * 1000)}ms",
@@ -5,103 +5,134 @@ Poll commands for Odd Bot.
 :license: MIT, see LICENSE for more details.
 """
 
-from typing import TYPE_CHECKING, Optional
+import asyncio
+import datetime
+from typing import TYPE_CHECKING, Iterable, Optional
 from collections import Counter
 
+import asyncpg
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 
+from cogs.utils.aio import gather_bounded
 from cogs.utils.embed import send_error_embed
 from cogs.utils.app_commands import Group
 from cogs.utils.time import str_to_timedelta
+from cogs.utils.polls import DeadlineScheduler, group_polls, pick_winner
 
 if TYPE_CHECKING:
     from bot import OddBot
 
 
 RED_TICK = "<:e:1063144718059442307>"
+
+POLL_CLOSE_CONCURRENCY = 4
+POLL_CLOSE_RETRY_DELAY = datetime.timedelta(minutes=1)
+
+ANNOUNCE_RETRY_INTERVAL = 300
+
+PURGE_INTERVAL = 60
+PURGE_BATCH_SIZE = 1000
+PURGE_DELAY = 0.5
+
+POLL_HISTORY_LIMIT = 10
     
 
-async def check_poll(bot: "OddBot", _message_id: Optional[int] = None) -> None:
-    async with bot.pool.acquire() as connection:
-        if _message_id is not None:  # ending early
-            end_early = True
-            result = await connection.fetchrow(
-                "SELECT message_id, channel_id FROM poll WHERE message_id = $1;",
-                _message_id    
-            )
-        else:
-            end_early = False
-            now = discord.utils.utcnow()
-            result = await connection.fetchrow(
-                "SELECT message_id, channel_id FROM poll WHERE deadline < $1;",
-                now.timestamp()
-            )
+def format_poll_description(deadline: datetime.datetime, tally: Iterable[tuple[str, str, int]]) -> str:
+    """Takes (emoji, text, vote count) for every option."""
 
-        if result is None:  # no poll
-            return None
+    tally = list(tally)
+    total = sum(count for _, _, count in tally)
 
-        if end_early:
-            _, channel_id = result
-            message_id = _message_id
-        else:
-            message_id, channel_id = result
+    description = f"Poll deadline: {discord.utils.format_dt(deadline, style='F')}\n\n"
+    for emoji, option, count in tally:
+        percentage = count / total * 100 if total else 0
+        description += f"{emoji} **{option}** • `{count}` ({percentage:.0f}%)\n"
 
-        channel = bot.get_channel(channel_id)
+    return description
 
-        assert message_id
-        try:
-            assert isinstance(channel, discord.TextChannel)
-            message = await channel.fetch_message(message_id)
-        except discord.NotFound:
-            await connection.execute("DELETE FROM poll WHERE message_id = $1;", message_id)
-            return None
 
-        option = await connection.fetchrow(
-            """
-            WITH max_vote_count AS (
-                SELECT MAX(vote_count) FROM (
-                    SELECT COUNT(poll_votes.id) AS vote_count
-                    FROM poll_options
-                    JOIN poll ON poll_options.poll_id = poll.id
-                    JOIN poll_votes ON poll_options.id = poll_votes.option_id
-                    WHERE poll.message_id = $1
-                    GROUP BY poll_options.id
-                ) temp
-            )
-            SELECT option_emoji, option_text, vote_count FROM (
-                SELECT poll_options.option_emoji, poll_options.option_text, COUNT(poll_votes.id) AS vote_count
-                FROM poll_options
-                JOIN poll ON poll_options.poll_id = poll.id
-                JOIN poll_votes ON poll_options.id = poll_votes.option_id
-                WHERE poll.message_id = $1
-                GROUP BY poll_options.id
-            ) temp_table
-            WHERE vote_count = (SELECT * FROM max_vote_count)
-            ORDER BY RANDOM();
-            """,
-            message_id
-        )
+async def update_poll_message(bot: "OddBot", message_id: int, message: discord.Message) -> None:
+    """Shows the live vote counts, called through ``bot.poll_updates`` so votes are batched into one edit."""
 
-        if not option:  # no votes
-            option = await connection.fetchrow(
-                """
-                SELECT option_emoji, option_text FROM poll_options
-                JOIN poll ON poll.id = poll_options.poll_id
-                WHERE poll_options.poll_id = poll.id AND
-                    poll.message_id = $1
-                ORDER BY RANDOM()
-                LIMIT 1;
-                """,
-                message_id
-            )
-            assert option
-            field_value = f"{option['option_emoji']}**{option['option_text']}** has been chosen randomly since nobody voted on this poll."
-        else:
-            field_value = f"{option['option_emoji']}**{option['option_text']}** has won with a total of **`{option['vote_count']}`** votes!"
+    poll = bot.polls.peek(message_id)
+    if poll is None or not message.embeds:  # the poll has ended
+        return None
+
+    embed = message.embeds[0]
+    embed.description = format_poll_description(poll.deadline, ((option.emoji, option.text, count) for option, count in poll.tally()))
+    try:
+        await message.edit(embed=embed)
+    except discord.HTTPException as e:
+        bot.log.warning(f"Updating the vote counts of poll {message_id} failed: {e}")
+
+
+async def check_poll(bot: "OddBot", message_id: int, end_early: bool = False) -> bool:
+    """Ends the poll and announces the winner, returns False if there was no open poll to end.
 
-        await connection.execute("DELETE FROM poll WHERE message_id = $1", message_id)
+    The poll row is only locked while its results are archived, so votes being
+    written never wait on Discord. Announcing is claimed separately afterwards,
+    so only one of several processes or the End button announces the results.
+    If Discord rejects the announcement it is released and retried by the
+    cog's announce loop.
+    """
+
+    await bot.votes.flush()
+    async with bot.db.claim_poll(message_id) as claimed:
+        if claimed is None:  # no poll, or it has already ended
+            return False
+
+        winner = pick_winner(claimed.results)
+        assert winner is not None
+
+        # only used by polls that were created before their guild was stored
+        channel = bot.get_channel(claimed.poll["channel_id"])
+        guild_id = channel.guild.id if isinstance(channel, discord.abc.GuildChannel) else None
+        await claimed.end(guild_id, winner, end_early)
+
+    bot.polls.pop(message_id)
+    bot.poll_updates.cancel(message_id)
+    await announce_ended_poll(bot, claimed.poll["id"])
+    return True
+
+
+async def announce_ended_poll(bot: "OddBot", poll_id: int) -> None:
+    """Announces the ended poll's results unless someone already has.
+
+    The claim is released when Discord fails the request, so the poll is
+    announced again later. Polls whose message or channel is gone are ended
+    without an announcement.
+    """
+
+    poll = await bot.db.claim_poll_announcement(poll_id)
+    if poll is None:
+        return None
+
+    channel = bot.get_channel(poll["channel_id"])
+    if not isinstance(channel, discord.TextChannel):
+        return None
+
+    try:
+        message = await channel.fetch_message(poll["message_id"])
+        await announce_poll(message, poll)
+    except discord.NotFound:
+        pass  # deleted polls are ended silently
+    except discord.HTTPException as e:
+        bot.log.warning(f"Announcing the results of poll {poll['message_id']} failed, retrying later: {e}")
+        await bot.db.release_poll_announcement(poll_id)
+
+
+async def announce_poll(message: discord.Message, poll: asyncpg.Record) -> None:
+    """Takes an archived poll, as returned by :meth:`Database.claim_poll_announcement`."""
+
+    results = list(zip(poll["option_emojis"], poll["option_texts"], poll["vote_counts"]))
+    emoji, text, vote_count = results[poll["winner"] - 1]
+
+    if not vote_count:  # no votes
+        field_value = f"{emoji}**{text}** has been chosen randomly since nobody voted on this poll."
+    else:
+        field_value = f"{emoji}**{text}** has won with a total of **`{vote_count}`** votes!"
 
     embed = discord.Embed(
         color=discord.Color.blue(),
@@ -110,11 +141,26 @@ async def check_poll(bot: "OddBot", _message_id: Optional[int] = None) -> None:
     )
     embed.add_field(name="Poll results:", value=field_value)
 
-    if end_early:
+    if poll["ended_early"]:
         embed.set_footer(text="This poll was force ended.")
 
-    await message.edit(view=None)
-    await channel.send(embed=embed)
+    if message.embeds:  # final vote counts
+        poll_embed = message.embeds[0]
+        poll_embed.description = format_poll_description(poll["deadline"], results)
+        await message.edit(embed=poll_embed, view=None)
+    else:
+        await message.edit(view=None)
+
+    await message.channel.send(embed=embed)
+
+
+async def poll_not_ended_message(bot: "OddBot", message_id: int) -> str:
+    """Explains why :func:`check_poll` returned False."""
+
+    if await bot.db.poll_ended(message_id) is None:
+        return "This poll does not exist."
+
+    return "This poll has already ended."
 
 
 class PollDropdown(discord.ui.Select):
@@ -126,35 +172,17 @@ class PollDropdown(discord.ui.Select):
         bot: OddBot = interaction.client # type: ignore
         selected_option = self.values[0]
 
-        async with bot.pool.acquire() as connection:
-            query = """
-            SELECT poll.id AS poll_id, poll_options.id AS poll_options_id,
-                poll_options.option_emoji, poll_options.option_text
-            FROM poll
-            JOIN poll_options ON poll.id = poll_options.poll_id
-            LEFT JOIN poll_votes ON poll_votes.option_id = poll_options.id AND
-                poll_votes.member_id = $1
-            WHERE poll.message_id = $2 AND poll_options.option_text = $3;
-            """
-            assert interaction.message
-            result = await connection.fetchrow(
-                query,
-                interaction.user.id,
-                interaction.message.id,
-                selected_option
-            )
-            if result is None:
-                return None
-
-            query = """
-            INSERT INTO poll_votes (member_id, poll_id, option_id)
-            VALUES ($1, $2, $3)
-            ON CONFLICT (member_id, poll_id)
-            DO UPDATE SET option_id = $3;
-            """
-            await connection.execute(query, interaction.user.id, result["poll_id"], result["poll_options_id"])
-            description = f"You voted for {result['option_emoji']}**{result['option_text']}**"
-                
+        assert interaction.message
+        poll = await bot.polls.get(interaction.message.id)
+        option = None if poll is None else poll.options.get(selected_option)
+        if poll is None or option is None:
+            return None
+
+        bot.votes.add(interaction.user.id, poll.id, option.id)
+        poll.vote(interaction.user.id, option.id)
+        bot.poll_updates.touch(poll.message_id, interaction.message)
+        description = f"You voted for {option.emoji}**{option.text}**"
+
         embed = discord.Embed(
             color=discord.Color.blue(),
             description=description
@@ -184,8 +212,12 @@ class PollView(discord.ui.View):
         assert isinstance(interaction.user, discord.Member)
         assert interaction.message
         if interaction.user.guild_permissions.manage_guild:
-            await check_poll(self.bot, interaction.message.id)
-            await interaction.response.send_message("You force ended the poll.", ephemeral=True)
+            if await check_poll(self.bot, interaction.message.id, end_early=True):
+                await interaction.response.send_message("You force ended the poll.", ephemeral=True)
+            else:
+                await interaction.response.send_message(
+                    await poll_not_ended_message(self.bot, interaction.message.id), ephemeral=True
+                )
             return None
 
         await interaction.response.send_message("You don't have the permission to do that.", ephemeral=True)
@@ -193,7 +225,7 @@ class PollView(discord.ui.View):
 
 class Poll(commands.Cog):
 
-    __slots__ = "bot", "log"
+    __slots__ = "bot", "log", "emojis", "scheduler", "_startup"
 
     def __init__(self, bot: "OddBot"):
         self.bot = bot
@@ -204,7 +236,39 @@ class Poll(commands.Cog):
             "<:e:1062755746942558268>", "<:e:1062755726923141201>",
             "<:e:1062755738814009375>", "<:e:1062755722233917541>"
         ]
-        self.poll_loop.start()
+        self.scheduler: DeadlineScheduler[int] = DeadlineScheduler(self.close_polls, log=self.log)
+        self._startup = asyncio.create_task(self.start_scheduler())
+        self.announce_loop.start()
+        self.purge_loop.start()
+
+    async def cog_unload(self) -> None:
+        self._startup.cancel()
+        self.scheduler.stop()
+        self.announce_loop.cancel()
+        self.purge_loop.cancel()
+
+    async def start_scheduler(self) -> None:
+        await self.bot.wait_until_ready()
+
+        # open polls are loaded into the cache at startup, overdue ones close right away
+        for poll in self.bot.polls:
+            self.scheduler.schedule(poll.message_id, poll.deadline)
+
+        self.scheduler.start()
+
+    async def close_polls(self, message_ids: list[int]) -> None:
+        results = await gather_bounded(
+            (check_poll(self.bot, message_id) for message_id in message_ids),
+            POLL_CLOSE_CONCURRENCY
+        )
+
+        for message_id, result in zip(message_ids, results):
+            if isinstance(result, Exception):
+                # the poll is still open, try again later
+                self.log.error(f"Closing poll {message_id} failed, retrying.", exc_info=result)
+                self.scheduler.schedule(message_id, discord.utils.utcnow() + POLL_CLOSE_RETRY_DELAY)
+            elif isinstance(result, BaseException):
+                raise result
 
     @commands.Cog.listener()
     async def on_ready(self) -> None:
@@ -263,9 +327,7 @@ class Poll(commands.Cog):
         deadline = discord.utils.utcnow() + deadline
         options_dict = {self.emojis[i]: option for i, option in enumerate(options)}
 
-        description = f"Poll deadline: {discord.utils.format_dt(deadline, style='F')}\n\n"
-        for emoji, option in options_dict.items():
-            description += f"{emoji} **{option}**\n"
+        description = format_poll_description(deadline, ((emoji, option, 0) for emoji, option in options_dict.items()))
 
         embed = discord.Embed(
             color=discord.Color.blue(),
@@ -284,21 +346,9 @@ class Poll(commands.Cog):
         embed.set_footer(text=f"Poll created by {interaction.user} • Poll ID: {message.id}")
         await message.edit(embed=embed, view=poll_view)
 
-        async with self.bot.pool.acquire() as connection:
-            poll_id = await connection.fetchval(
-                """
-                INSERT INTO poll (message_id, channel_id, deadline) VALUES ($1, $2, $3)
-                RETURNING id;
-                """,
-                message.id,
-                channel.id,
-                deadline.timestamp()
-            )
-
-            await connection.executemany(
-                "INSERT INTO poll_options (poll_id, option_emoji, option_text) VALUES ($1, $2, $3);",
-                [(poll_id, emoji, option) for (emoji, option) in options_dict.items()]
-            )
+        rows = await self.bot.db.create_poll(message.id, channel.id, interaction.guild.id, deadline, options_dict)
+        self.bot.polls.add(group_polls(rows)[0])
+        self.scheduler.schedule(message.id, deadline)
 
         embed = discord.Embed(
             color=discord.Color.green(),
@@ -325,19 +375,63 @@ class Poll(commands.Cog):
             )
             return None
 
-        async with self.bot.pool.acquire() as connection:
-            result = await connection.fetchrow("SELECT message_id FROM poll WHERE message_id = $1;", message_id)
-
-        await check_poll(self.bot, message_id)
-        if result is None:
-            await interaction.response.send_message("This poll does not exist.", ephemeral=True)
-        else:
+        # stays scheduled unless it ended, so a failure or a close that rolls back is retried at the deadline
+        if await check_poll(self.bot, message_id, end_early=True):
+            self.scheduler.cancel(message_id)
             await interaction.response.send_message("You force ended this poll.", ephemeral=True)
+        else:
+            await interaction.response.send_message(await poll_not_ended_message(self.bot, message_id), ephemeral=True)
+
+    @poll_group.command(name="history", description="Shows the results of the most recently ended polls")
+    async def poll_history(self, interaction: discord.Interaction) -> None:
+        assert interaction.guild
+
+        results = await self.bot.db.fetch_poll_history(interaction.guild.id, POLL_HISTORY_LIMIT)
+        if not results:
+            await send_error_embed(interaction, "No poll has ended in this server yet.")
+            return None
+
+        items = []
+        for index, poll in enumerate(results, start=1):
+            jump_url = f"https://discord.com/channels/{interaction.guild.id}/{poll['channel_id']}/{poll['message_id']}"
+            ended = discord.utils.format_dt(poll["ended_at"], style="R")
+            force_ended = " *(force ended)*" if poll["ended_early"] else ""
+            items.append(
+                f"**{index}.** {poll['option_emoji']}**{poll['option_text']}** with **`{poll['vote_count']}`** votes"
+                f" • [ended {ended}]({jump_url}){force_ended}"
+            )
+
+        embed = discord.Embed(
+            color=discord.Color.blue(),
+            title="Poll history",
+            description="\n".join(items)
+        )
+        await interaction.response.send_message(embed=embed)
+
+    @tasks.loop(seconds=ANNOUNCE_RETRY_INTERVAL)
+    async def announce_loop(self) -> None:
+        """Announces ended polls whose announcement failed or never happened, starting right after login."""
 
-    @tasks.loop(seconds=5.0)
-    async def poll_loop(self):
         await self.bot.wait_until_ready()
-        await check_poll(self.bot)
+
+        try:
+            for poll_id in await self.bot.db.fetch_unannounced_polls():
+                await announce_ended_poll(self.bot, poll_id)
+        except Exception:
+            self.log.exception("Announcing polls that ended without an announcement failed.")
+
+    @tasks.loop(seconds=PURGE_INTERVAL)
+    async def purge_loop(self) -> None:
+        """Deletes the votes of ended polls in small batches, their results are already archived."""
+
+        await self.bot.wait_until_ready()
+
+        # caught here, the loop would stop on anything but a network error
+        try:
+            while await self.bot.db.purge_ended_polls(PURGE_BATCH_SIZE) >= PURGE_BATCH_SIZE:
+                await asyncio.sleep(PURGE_DELAY)
+        except Exception:
+            self.log.exception("Purging the votes of ended polls failed.")
 
         
 async def setup(bot: "OddBot") -> None:
@@ -5,22 +5,28 @@ Main feature of Odd Bot, keeps track of submissions.
 :license: MIT, see LICENSE for more details.
 """
 
+import re
 import string
+import time
 import random
+import asyncio
+import datetime
 from io import BytesIO
-from typing import Optional, TYPE_CHECKING, Any
+from functools import partial
+from typing import Optional, TYPE_CHECKING, Any, Awaitable, Callable
 
-import aiohttp
 import asyncpg
 import discord
 from discord import app_commands
-from discord.ext import commands
-from bs4 import BeautifulSoup, Tag
+from discord.ext import commands, tasks
 
 from cogs import errors
 from cogs.utils.view import Confirm
 from cogs.utils.embed import EmbedPaginator, create_embed_with_author, send_error_embed
 from cogs.utils.app_commands import Group
+from cogs.utils.aio import gather_or_cancel, gather_bounded
+from cogs.utils.database import FIRST_PAGE_KEY
+from cogs.utils.titles import TitleIndex
 
 if TYPE_CHECKING:
     from bot import OddBot
@@ -48,14 +54,32 @@ OPEN_SOURCE_FILES = [
     "cogs/utils/views.py"
 ]
 
+BULK_URL_SEPARATOR = re.compile(r"[\s,]+")
+BULK_CONCURRENCY = 5
+MAX_BULK_SUBMISSIONS = 100
+MAX_BULK_ATTACHMENT_SIZE = 64 * 1024
+
+SUBMISSIONS_PER_PAGE = 10
+SEARCH_LIMIT = 10
+MAX_SEARCH_LENGTH = 100
+
+CLEAR_CHUNK_SIZE = 500
+CLEAR_PROGRESS_INTERVAL = 2.0
+
+REFRESH_INTERVAL = 10 * 60
+REFRESH_STALE_AFTER = datetime.timedelta(days=1)
+REFRESH_DELETED_STALE_AFTER = datetime.timedelta(days=7)
+REFRESH_BATCH_SIZE = 20
+REFRESH_DELAY = 1.0
+
 
 async def handle_confirm_view(
     config: dict[str, Any],
     bot: "OddBot",
     interaction: discord.Interaction,
     view: Confirm,
-    exec_args: tuple[Any, ...],
-    results: asyncpg.Record | list[asyncpg.Record],
+    delete: Callable[..., Awaitable[Any]],
+    results: asyncpg.Record | int,
     success_message: Optional[str] = None,
     delete_many: bool = False
 ) -> None:
@@ -82,15 +106,15 @@ async def handle_confirm_view(
         )
         await interaction.edit_original_response(embed=embed, view=None)
 
-        query, *args = exec_args
+        if delete_many:
+            async def report_progress(deleted: int) -> None:
+                embed.description = f"{confirm_message} ({deleted}/{results})"
+                await interaction.edit_original_response(embed=embed)
 
-        if not delete_many:
-            async with bot.pool.acquire() as connection:
-                await connection.execute(query, *args)
+            deleted = await delete(report_progress)
+            embed.set_footer(text=f"Deleted a total of {deleted} submissions.")
         else:
-            async with bot.pool.acquire() as connection:
-                await connection.execute(query, *args)
-            embed.set_footer(text=f"Deleted a total of {len(results)} submissions.")
+            await delete()
 
         embed.description = success_message
         embed.color = discord.Color.green()
@@ -105,87 +129,156 @@ async def handle_confirm_view(
         await interaction.edit_original_response(embed=embed, view=None)
 
 
-async def create_submissions_embed(
+def create_submissions_embed(
     interaction: discord.Interaction,
     results: list[asyncpg.Record],
+    start: int,
+    total: int,
     member: Optional[discord.Member | discord.User] = None,
     show_all: bool = True
-) -> list[discord.Embed]:
+) -> discord.Embed:
 
     assert interaction.guild
     assert interaction.guild.icon
 
-    embeds = []
+    items = []
+    for item_index, submission in enumerate(results, start=start+1):
+        user = interaction.guild.get_member(submission["author_id"])
+        deleted = " *(deleted from Fancade)*" if submission["deleted"] else ""
+        items.append(f"**{item_index}.** [{submission['game_title']}]({submission['game_url']}){deleted}{f' • {user}' if show_all else ''}")
 
-    end = 10
-    for start in range(0, len(results), 10):
-        current_submissions = results[start:end]
-        end += 10
-        
-        items = []
-        for item_index, submission in enumerate(current_submissions, start=start+1):
-            user = interaction.guild.get_member(submission["author_id"])
-            items.append(f"**{item_index}.** [{submission['game_title']}]({submission['game_url']}){f' • {user}' if show_all else ''}")
+    item = "\n".join(items)
 
-        item = "\n".join(items)
+    return create_embed_with_author(
+        color=discord.Color.blue(),
+        description=f"**Showing all submissions:**\n\n{item}" if show_all else f"**Showing all of {member}'s submissions:**\n\n{item}",
+        author=f"{interaction.guild} Submissions (Total: {total})" if show_all else interaction.user,
+        icon_url=interaction.guild.icon.url if show_all else None
+    )
 
-        embed = create_embed_with_author(
-            color=discord.Color.blue(),
-            description=f"**Showing all submissions:**\n\n{item}" if show_all else f"**Showing all of {member}'s submissions:**\n\n{item}",
-            author=f"{interaction.guild} Submissions (Total: {len(results)})" if show_all else interaction.user,
-            icon_url=interaction.guild.icon.url if show_all else None
+
+class SubmissionPages:
+    """Fetches one page of submissions at a time for :class:`EmbedPaginator`.
+
+    Pages are keyset paginated, the key each page starts after is
+    remembered so going back re-runs the same indexed query.
+    """
+
+    __slots__ = "bot", "interaction", "total", "member", "show_all", "_keys"
+
+    def __init__(
+        self,
+        bot: "OddBot",
+        interaction: discord.Interaction,
+        total: int,
+        member: Optional[discord.Member | discord.User] = None,
+        show_all: bool = True
+    ) -> None:
+        self.bot = bot
+        self.interaction = interaction
+        self.total = total
+        self.member = member
+        self.show_all = show_all
+        self._keys: list[tuple[int, int]] = [FIRST_PAGE_KEY]
+
+    @property
+    def max_pages(self) -> int:
+        return max(1, -(-self.total // SUBMISSIONS_PER_PAGE))
+
+    async def get_page(self, index: int) -> discord.Embed:
+        assert self.interaction.guild
+
+        results = await self.bot.db.fetch_submissions_page(
+            self.interaction.guild.id,
+            self._keys[index],
+            SUBMISSIONS_PER_PAGE,
+            None if self.show_all or self.member is None else self.member.id
         )
-        embeds.append(embed)
 
-    return embeds
+        if results and len(self._keys) == index + 1:
+            self._keys.append((results[-1]["author_id"], results[-1]["id"]))
 
+        return create_submissions_embed(
+            self.interaction,
+            results,
+            index * SUBMISSIONS_PER_PAGE,
+            self.total,
+            self.member,
+            self.show_all
+        )
 
-async def game_exists_check(game_id: str) -> bool:
-    async with aiohttp.ClientSession() as session, session.get(f"https://www.fancade.com/images/{game_id}.jpg") as response:
-        try:
-            r = await response.text()
-            doc = BeautifulSoup(r, "html.parser")
-            page_not_found = doc.find("h1")
-            page_not_found = getattr(page_not_found, "text", page_not_found)
 
-            if page_not_found == "Page Not Found":
-                return False
+def check_game_url(game_url: str) -> str:
+    """Returns the game's ID or raises if the URL isn't a Fancade game URL."""
+
+    if not game_url.startswith("https://play.fancade.com/"):
+        raise errors.UnrecognizedUrlError("I don't recognize that URL.")
+
+    game_id = game_url[25:]
+    if len(game_id) != 16:
+        raise errors.InvalidUrlError("That is an invalid URL.")
+
+    return game_id
+
+
+def check_submit_permission(user: discord.Member, member: Optional[discord.Member]) -> None:
+    can_manage_guild = user.guild_permissions.manage_guild
+    if not can_manage_guild and member != user and member is not None:
+        raise errors.MissingPermission("Manage Server")
+
 
-        except UnicodeDecodeError:
-            return True
+async def resolve_game(bot: "OddBot", game_id: str) -> dict[str, Any]:
+    game_attrs = await bot.fancade.get_game(game_id)
+    if game_attrs is None:
+        raise errors.GameNotFoundError("Hmm.. It seems like that game doesn't exist.")
 
-    return False
+    if game_attrs["title"] == "Fancade":  # has an image but no title
+        identifier = "".join(random.choices(string.ascii_letters, k=6))
+        game_attrs["title"] = f"?ULG_{identifier}?"
 
+    return game_attrs
 
-async def get_game_attrs(game_url: str) -> dict[str, Any]:
-    async with aiohttp.ClientSession() as session, session.get(game_url) as response:
-        r = await response.text()
-        doc = BeautifulSoup(r, "html.parser")
 
-        title = doc.find("title")
-        title = getattr(title, "text", title)
+def already_submitted(guild: discord.Guild, submission: asyncpg.Record) -> errors.SubmissionAlreadyExists:
+    author = guild.get_member(submission["author_id"])
+    return errors.SubmissionAlreadyExists(
+        f"The game **{submission['game_title']}** has already been submitted by **{author}**."
+    )
+
 
-        author = doc.find("p", class_="author")
+def format_url_list(urls: list[str], limit: int = 1024) -> str:
+    """Formats the URLs as lines that fit in an embed field."""
 
-        image_url = doc.find("meta", attrs={"property": "og:image"})
-        description = doc.find("meta", attrs={"name": "description"})
+    if not urls:
+        return "None"
 
-        assert isinstance(image_url, Tag)
-        assert isinstance(description, Tag)
+    lines = []
+    length = 0
+    for index, url in enumerate(urls):
+        more = f"...and {len(urls) - index} more"
+        if length + len(url) + 1 + len(more) > limit:
+            lines.append(more)
+            break
 
-        image_url = image_url.attrs["content"]
-        description = description.attrs["content"]
+        lines.append(url)
+        length += len(url) + 1
 
-    return {"title": title, "image_url": image_url, "description": description, "author": author}
+    return "\n".join(lines)
 
 
 class Submission(commands.Cog):
 
-    __slots__ = "bot", "log"
+    __slots__ = "bot", "log", "titles", "_autocompletes"
 
     def __init__(self, bot: "OddBot") -> None:
         self.bot = bot
         self.log = bot.log
+        self.titles = TitleIndex(lambda guild_id: self.bot.db.fetch_titles(guild_id))
+        self._autocompletes: dict[int, int] = {}  # user ID -> latest autocomplete interaction ID
+        self.refresh_loop.start()
+
+    async def cog_unload(self) -> None:
+        self.refresh_loop.cancel()
 
     # groups
     submissions_group = Group(name="submissions", description="Commands related to submissions.")
@@ -209,6 +302,10 @@ class Submission(commands.Cog):
         assert isinstance(interaction.user, discord.Member)
         assert interaction.guild
 
+        # cheap checks first, these don't need any I/O
+        game_id = check_game_url(game_url)
+        check_submit_permission(interaction.user, member)
+
         embed = create_embed_with_author(
             color=discord.Color.blue(),
             description=f"{self.bot.config['loading_emoji']} Processing submission...",
@@ -216,72 +313,132 @@ class Submission(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
-        if not game_url.startswith("https://play.fancade.com/"):
-            raise errors.UnrecognizedUrlError("I don't recognize that URL.")
-
-        async with self.bot.pool.acquire() as connection:
-            result = await connection.fetchrow(
-                """
-                SELECT author_id, game_title FROM submission
-                WHERE guild_id = $1 AND game_url = $2;
-                """,
-                interaction.guild_id,
-                game_url
-            )
-        game_attrs = await get_game_attrs(game_url)
-
-        can_manage_guild = interaction.user.guild_permissions.manage_guild
-        if not can_manage_guild and member != interaction.user and member is not None:
-            raise errors.MissingPermission("Manage Server")
+        async def check_duplicate() -> None:
+            assert interaction.guild
+            result = await self.bot.db.find_submission(interaction.guild.id, game_url)
+            if result is not None:
+                raise already_submitted(interaction.guild, result)
 
-        if result is not None:
-            author = interaction.guild.get_member(result["author_id"])
-            raise errors.SubmissionAlreadyExists(
-                f"The game **{result['game_title']}** has already been submitted by **{author}**."
-            )
+        # a quick check so duplicates fail without waiting on fancade, it cancels the lookup
+        _, game_attrs = await gather_or_cancel(
+            check_duplicate(),
+            resolve_game(self.bot, game_id)
+        )
 
-        game_id = game_url[25:]
-        if len(game_id) != 16:
-            raise errors.InvalidUrlError("That is an invalid URL.")
+        # the unique (guild_id, game_url) index rejects duplicates, even concurrent ones
+        author = interaction.user if member is None else member
+        result = await self.bot.db.insert_submission(author.id, interaction.guild.id, game_url, game_attrs)
+        if result is None:
+            raise errors.SubmissionAlreadyExists("That game has already been submitted.")
 
-        game_exists = await game_exists_check(game_id)
-        if game_exists and game_attrs["title"] == "Fancade":  # has an image but no title
-            identifier = "".join(random.choices(string.ascii_letters, k=6))
-            game_attrs["title"] = f"?ULG_{identifier}?"
+        if not result["inserted"]:
+            raise already_submitted(interaction.guild, result)
 
-        elif not game_exists and game_attrs["title"] == "Fancade":  # has no image and no title
-            raise errors.GameNotFoundError("Hmm.. It seems like that game doesn't exist.")
+        self.titles.add(interaction.guild.id, game_url, author.id, game_attrs["title"])
 
         if member is None or member == interaction.user:
-            async with self.bot.pool.acquire() as connection:
-                await connection.execute(
-                    "INSERT INTO submission (author_id, guild_id, game_title, game_url) VALUES ($1, $2, $3, $4);",
-                    interaction.user.id,
-                    interaction.guild_id,
-                    game_attrs["title"],
-                    game_url
-                )
-
             embed.description = f"{interaction.user.mention}, your game **{game_attrs['title']}** was submitted successfully."
             embed.set_thumbnail(url=game_attrs["image_url"])
 
         else:
             assert member.avatar
-            async with self.bot.pool.acquire() as connection:
-                await connection.execute(
-                    "INSERT INTO submission (author_id, guild_id, game_title, game_url) VALUES ($1, $2, $3, $4);",
-                    member.id,
-                    interaction.guild_id,
-                    game_attrs["title"],
-                    game_url
-                )
-
             embed.description = f"{interaction.user.mention}, the game **{game_attrs['title']}** was submitted successfully."
             embed.set_thumbnail(url=game_attrs["image_url"])
             embed.set_footer(text=f"Submitted for {member}", icon_url=member.avatar.url)
 
         await interaction.edit_original_response(embed=embed)
 
+    @submissions_group.command(name="bulk", description="Submits many games to the database at once")
+    @app_commands.describe(
+        game_urls="The games' urls, separated by spaces, commas or new lines.",
+        attachment="A text file with the games' urls, separated by spaces, commas or new lines.",
+        member="The member you want to submit for. This requires Manage Server permission."
+    )
+    async def bulk_submit_command(
+        self,
+        interaction: discord.Interaction,
+        game_urls: Optional[str] = None,
+        attachment: Optional[discord.Attachment] = None,
+        member: Optional[discord.Member] = None
+    ) -> None:
+
+        assert isinstance(interaction.user, discord.Member)
+        assert interaction.guild
+
+        check_submit_permission(interaction.user, member)
+
+        text = game_urls or ""
+        if attachment is not None:
+            if attachment.size > MAX_BULK_ATTACHMENT_SIZE:
+                raise errors.TooManySubmissionsError(f"The attachment cannot exceed {MAX_BULK_ATTACHMENT_SIZE // 1024}KB.")
+
+            text += "\n" + (await attachment.read()).decode("utf8", errors="replace")
+
+        urls = list(dict.fromkeys(url for url in BULK_URL_SEPARATOR.split(text) if url))
+        if not urls:
+            raise errors.NoSubmissionError("Please give me at least one game URL.")
+
+        if len(urls) > MAX_BULK_SUBMISSIONS:
+            raise errors.TooManySubmissionsError(f"You can only submit up to {MAX_BULK_SUBMISSIONS} games at once.")
+
+        embed = create_embed_with_author(
+            color=discord.Color.blue(),
+            description=f"{self.bot.config['loading_emoji']} Processing {len(urls)} submissions...",
+            author=interaction.user
+        )
+        await interaction.response.send_message(embed=embed)
+
+        invalid: list[str] = []
+        game_ids: dict[str, str] = {}
+        for url in urls:
+            try:
+                game_ids[url] = check_game_url(url)
+            except (errors.UnrecognizedUrlError, errors.InvalidUrlError):
+                invalid.append(url)
+
+        duplicates = await self.bot.db.find_submitted_urls(interaction.guild.id, list(game_ids))
+        for url in duplicates:
+            del game_ids[url]
+
+        games = await gather_bounded(
+            (resolve_game(self.bot, game_id) for game_id in game_ids.values()),
+            BULK_CONCURRENCY
+        )
+
+        accepted: list[tuple[str, dict[str, Any]]] = []
+        failed: list[str] = []
+        for url, game_attrs in zip(game_ids, games):
+            if isinstance(game_attrs, errors.GameNotFoundError):
+                invalid.append(url)
+            elif isinstance(game_attrs, errors.FancadeUnavailableError):
+                failed.append(url)
+            elif isinstance(game_attrs, BaseException):
+                raise game_attrs
+            else:
+                accepted.append((url, game_attrs))
+
+        author_id = interaction.user.id if member is None else member.id
+        if accepted:
+            # anything submitted by someone else in the meantime is skipped by the insert
+            inserted = set(await self.bot.db.insert_submissions(author_id, interaction.guild.id, accepted))
+            duplicates.extend(url for url, _ in accepted if url not in inserted)
+            accepted = [(url, game_attrs) for url, game_attrs in accepted if url in inserted]
+            for url, game_attrs in accepted:
+                self.titles.add(interaction.guild.id, url, author_id, game_attrs["title"])
+
+        embed.color = discord.Color.green() if accepted else discord.Color.red()
+        embed.description = f"{interaction.user.mention}, **{len(accepted)}** of **{len(urls)}** games were submitted successfully."
+        embed.add_field(name=f"Accepted ({len(accepted)})", value=format_url_list([url for url, _ in accepted]), inline=False)
+        embed.add_field(name=f"Duplicates ({len(duplicates)})", value=format_url_list(duplicates), inline=False)
+        embed.add_field(name=f"Invalid ({len(invalid)})", value=format_url_list(invalid), inline=False)
+        if failed:
+            embed.add_field(name=f"Failed, try again ({len(failed)})", value=format_url_list(failed), inline=False)
+
+        if member is not None and member != interaction.user:
+            embed.set_footer(text=f"Submitted for {member}")
+
+        await interaction.edit_original_response(embed=embed)
+
     @submissions_group.command(name="unsubmit", description="Unsubmits your game from the database")
     @app_commands.describe(game_url="Your game's URL, you can get this by sharing your game in Fancade.")
     async def unsubmit_command(self, interaction: discord.Interaction, game_url: str) -> None:
@@ -291,15 +448,7 @@ class Submission(commands.Cog):
         if not game_url.startswith("https://play.fancade.com/"):
             raise errors.UnrecognizedUrlError("I don't recognize that URL.")
 
-        async with self.bot.pool.acquire() as connection:
-            result = await connection.fetchrow(
-                """
-                SELECT author_id, game_title, game_url FROM submission
-                WHERE guild_id = $1 AND game_url = $2;
-                """,
-                interaction.guild_id,
-                game_url
-            )
+        result = await self.bot.db.find_submission(interaction.guild.id, game_url)
 
         if result is None:
             raise errors.SubmissionNotInDatabase("I can't find that game in the database.")
@@ -318,6 +467,8 @@ class Submission(commands.Cog):
                 description=f"This will delete the submission **{result['game_title']}** which was submitted by **{author}**. Are you sure you wanna proceed?",
                 author=interaction.user
             )
+            if result["image_url"] is not None:
+                embed.set_thumbnail(url=result["image_url"])
             await interaction.response.send_message(embed=embed, view=view)
 
         if author.id == interaction.user.id:
@@ -326,6 +477,8 @@ class Submission(commands.Cog):
                 description=f"This will delete your submission **{result['game_title']}**. Are you sure you wanna proceed?",
                 author=interaction.user
             )
+            if result["image_url"] is not None:
+                embed.set_thumbnail(url=result["image_url"])
             await interaction.response.send_message(embed=embed, view=view)
 
         await handle_confirm_view(
@@ -333,10 +486,41 @@ class Submission(commands.Cog):
             bot=self.bot,
             interaction=interaction,
             view=view,
-            exec_args=("DELETE FROM submission WHERE game_url = $1;", result["game_url"]),
+            delete=partial(self.delete_submission, interaction.guild.id, result["game_url"]),
             results=result
         )
 
+    async def delete_submission(self, guild_id: int, game_url: str) -> None:
+        game_title = await self.bot.db.delete_submission(guild_id, game_url)
+        self.titles.discard(guild_id, game_url)
+
+        # removed by someone else while the confirmation was pending
+        if game_title is None:
+            raise errors.SubmissionNotInDatabase("That game has already been removed from the database.")
+
+    async def delete_submissions(
+        self,
+        guild_id: int,
+        author_id: Optional[int] = None,
+        progress: Optional[Callable[[int], Awaitable[Any]]] = None
+    ) -> int:
+        """Deletes the submissions in chunks and returns how many were deleted."""
+
+        deleted = 0
+        last_report = time.monotonic()
+        try:
+            while True:
+                count = await self.bot.db.delete_submissions(guild_id, author_id, CLEAR_CHUNK_SIZE)
+                deleted += count
+                if count < CLEAR_CHUNK_SIZE:
+                    return deleted
+
+                if progress is not None and time.monotonic() - last_report >= CLEAR_PROGRESS_INTERVAL:
+                    last_report = time.monotonic()
+                    await progress(deleted)
+        finally:
+            self.titles.clear(guild_id, author_id)
+
     @unsubmit_command.autocomplete("game_url")
     async def unsubmit_autocomplete(
         self,
@@ -346,37 +530,27 @@ class Submission(commands.Cog):
         assert isinstance(interaction.user, discord.Member)
         assert interaction.guild
 
+        index = self.titles.peek(interaction.guild.id)
+        if index is None:
+            # only the first keystroke in a guild waits for the titles to load
+            self._autocompletes[interaction.user.id] = interaction.id
+            index = await self.titles.get(interaction.guild.id)
+            if self._autocompletes.get(interaction.user.id) != interaction.id:
+                return []  # the user kept typing, a newer request will answer
+
+            del self._autocompletes[interaction.user.id]
+
         if interaction.user.guild_permissions.manage_guild:
-            async with self.bot.pool.acquire() as connection:
-                results = await connection.fetch(
-                    """
-                    SELECT * FROM submission
-                    WHERE game_title ~* $1 AND guild_id = $2
-                    ORDER BY author_id;
-                    """,
-                    current,
-                    interaction.guild_id
-                )
             return [
                 app_commands.Choice(
-                    name=f"{result['game_title']} by {interaction.guild.get_member(result['author_id'])}",
-                    value=result["game_url"]
-                ) for result in results
+                    name=f"{entry.game_title} by {interaction.guild.get_member(entry.author_id)}"[:100],
+                    value=entry.game_url
+                ) for entry in index.search(current)
             ]
         else:
-            async with self.bot.pool.acquire() as connection:
-                results = await connection.fetch(
-                    """
-                    SELECT * FROM submission
-                    WHERE game_title ~* $1 AND guild_id = $2 AND author_id = $3
-                    ORDER BY author_id;
-                    """,
-                    current,
-                    interaction.guild_id,
-                    interaction.user.id
-                )
             return [
-                app_commands.Choice(name=result['game_title'], value=result["game_url"]) for result in results
+                app_commands.Choice(name=entry.game_title[:100], value=entry.game_url)
+                for entry in index.search(current, interaction.user.id)
             ]
 
     @submissions_group.command(name="show", description="Shows your (or another person's) submissions.")
@@ -395,46 +569,23 @@ class Submission(commands.Cog):
         assert interaction.guild
 
         if show_all:
-            async with self.bot.pool.acquire() as connection:
-                results = await connection.fetch(
-                    """SELECT * FROM submission
-                    WHERE guild_id = $1
-                    ORDER BY author_id;
-                    """,
-                    interaction.guild_id
-                )
+            total = await self.bot.db.count_submissions(interaction.guild.id)
             no_submission_message = "Hmm, it seems like nobody has submitted anything yet."
             user = None
 
         elif member is None or member == interaction.user:
-            async with self.bot.pool.acquire() as connection:
-                results = await connection.fetch(
-                    """SELECT * FROM submission
-                    WHERE guild_id = $1 AND author_id = $2
-                    ORDER BY author_id;
-                    """,
-                    interaction.guild_id,
-                    interaction.user.id
-                )
+            total = await self.bot.db.count_submissions(interaction.guild.id, interaction.user.id)
             no_submission_message = "You haven't submitted anything yet."
             show_all = False
             user = interaction.user
 
         elif member is not None or member != interaction.user:
-            async with self.bot.pool.acquire() as connection:
-                results = await connection.fetch(
-                    """SELECT * FROM submission
-                    WHERE guild_id = $1 AND author_id = $2
-                    ORDER BY author_id
-                    """,
-                    interaction.guild_id,
-                    member.id
-                )
+            total = await self.bot.db.count_submissions(interaction.guild.id, member.id)
             no_submission_message = f"**{member}** hasn't submitted anything yet."
             show_all = False
             user = member
 
-        if not results:
+        if not total:
             raise errors.NoSubmissionError(no_submission_message)
 
         embed = create_embed_with_author(
@@ -444,12 +595,55 @@ class Submission(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
-        embeds = await create_submissions_embed(interaction, results, user, show_all)
-        paginator = EmbedPaginator(interaction, embeds)
-        
-        embed = paginator.index_page
+        pages = SubmissionPages(self.bot, interaction, total, user, show_all)
+        paginator = EmbedPaginator(interaction, pages.max_pages, pages.get_page)
+
+        embed = await paginator.index_page()
         await interaction.edit_original_response(embed=embed, view=paginator)       
 
+    @submissions_group.command(name="search", description="Searches the submissions by game title.")
+    @app_commands.describe(
+        query="The game title, or part of it, you're looking for.",
+        member="Only search this member's submissions."
+    )
+    async def search_submissions_command(
+        self,
+        interaction: discord.Interaction,
+        query: app_commands.Range[str, 1, MAX_SEARCH_LENGTH],
+        member: Optional[discord.Member] = None
+    ) -> None:
+
+        assert interaction.guild
+
+        results = await self.bot.db.search_submissions(
+            interaction.guild.id,
+            query,
+            SEARCH_LIMIT,
+            None if member is None else member.id
+        )
+        if not results:
+            raise errors.NoSubmissionError(
+                f"I couldn't find any submissions matching **{discord.utils.escape_markdown(query)}**"
+                + (f" by **{member}**." if member is not None else ".")
+            )
+
+        items = []
+        for item_index, submission in enumerate(results, start=1):
+            user = interaction.guild.get_member(submission["author_id"])
+            deleted = " *(deleted from Fancade)*" if submission["deleted"] else ""
+            items.append(f"**{item_index}.** [{submission['game_title']}]({submission['game_url']}){deleted} • {user}")
+
+        item = "\n".join(items)
+        embed = create_embed_with_author(
+            color=discord.Color.blue(),
+            description=f"**Best matches for {discord.utils.escape_markdown(query)}:**\n\n{item}",
+            author=interaction.user
+        )
+        if member is not None:
+            embed.set_footer(text=f"Only showing {member}'s submissions")
+
+        await interaction.response.send_message(embed=embed)
+
     @submissions_group.command(name="clear", description="Clears your (or another person's) submissions.")
     @app_commands.describe(
         member="The member you want to clear the submissions of. This requires Manage Server permission.",
@@ -469,56 +663,33 @@ class Submission(commands.Cog):
         can_manage_guild = interaction.user.guild_permissions.manage_guild
 
         if clear_all:
-            async with self.bot.pool.acquire() as connection:
-                results = await connection.fetch(
-                    """SELECT * FROM submission
-                    WHERE guild_id = $1
-                    ORDER BY author_id;
-                    """,
-                    interaction.guild_id
-                )
+            total = await self.bot.db.count_submissions(interaction.guild.id)
             no_submission_message = "Hmm, it seems like nobody has submitted anything yet."
             success_message = "All submissions have been deleted."
             confirm_message = "This will delete everyone's submissions. Are you sure you wanna proceed?"
-            exec_args = ("DELETE FROM submission WHERE guild_id = $1", interaction.guild_id)
+            delete = partial(self.delete_submissions, interaction.guild.id)
 
             if not can_manage_guild:
                 raise errors.MissingPermission("Manage Server")
 
         elif member is None or member == interaction.user:
-            async with self.bot.pool.acquire() as connection:
-                results = await connection.fetch(
-                    """SELECT * FROM submission
-                    WHERE guild_id = $1 AND author_id = $2
-                    ORDER BY author_id;
-                    """,
-                    interaction.guild_id,
-                    interaction.user.id
-                )
+            total = await self.bot.db.count_submissions(interaction.guild.id, interaction.user.id)
             no_submission_message = "You haven't submitted anything yet."
             success_message = "Deleted all of your submissions."
             confirm_message = "This will delete all of your submissions. Are you sure you wanna proceed?"
-            exec_args = ("DELETE FROM submission WHERE guild_id = $1 AND author_id = $2", interaction.guild_id, interaction.user.id)
+            delete = partial(self.delete_submissions, interaction.guild.id, interaction.user.id)
 
         elif member is not None or member != interaction.user:
-            async with self.bot.pool.acquire() as connection:
-                results = await connection.fetch(
-                    """SELECT * FROM submission
-                    WHERE guild_id = $1 AND author_id = $2
-                    ORDER BY author_id;
-                    """,
-                    interaction.guild_id,
-                    member.id
-                )
+            total = await self.bot.db.count_submissions(interaction.guild.id, member.id)
             no_submission_message = f"**{member}** hasn't submitted anything yet."
             success_message = f"Deleted all of **{member}**'s submissions."
             confirm_message = f"This will delete all of **{member}**'s submissions. Are you sure you wanna proceed?"
-            exec_args = ("DELETE FROM submission WHERE guild_id = $1 AND author_id = $2", interaction.guild_id, member.id)
+            delete = partial(self.delete_submissions, interaction.guild.id, member.id)
 
             if not can_manage_guild:
                 raise errors.MissingPermission("Manage Server")
 
-        if not results:
+        if not total:
             raise errors.NoSubmissionError(no_submission_message)
 
         view = Confirm(interaction.user)
@@ -535,12 +706,57 @@ class Submission(commands.Cog):
             bot=self.bot,
             interaction=interaction,
             view=view,
-            exec_args=exec_args,
-            results=results,
+            delete=delete,
+            results=total,
             success_message=success_message,
             delete_many=True
         )
 
+    @tasks.loop(seconds=REFRESH_INTERVAL)
+    async def refresh_loop(self) -> None:
+        await self.bot.wait_until_ready()
+
+        # tasks.loop only survives network errors, a dropped database connection would stop it for good
+        try:
+            await self.refresh_games()
+        except Exception:
+            self.log.exception("Refreshing submitted games failed.")
+
+    async def refresh_games(self) -> None:
+        """Re-validates the stalest submitted games in small, rate limited batches.
+
+        Games found again after being marked as deleted are restored.
+        """
+
+        game_urls = await self.bot.db.fetch_stale_game_urls(REFRESH_STALE_AFTER, REFRESH_BATCH_SIZE, REFRESH_DELETED_STALE_AFTER)
+
+        updated: list[tuple[str, Optional[str], Optional[str], Optional[str], Optional[str]]] = []
+        deleted: list[str] = []
+        for game_url in game_urls:
+            try:
+                game_attrs = await self.bot.fancade.get_game(check_game_url(game_url), refresh=True)
+            except errors.FancadeUnavailableError:
+                break  # try again on the next run
+            except (errors.UnrecognizedUrlError, errors.InvalidUrlError):
+                game_attrs = None
+
+            if game_attrs is None:
+                deleted.append(game_url)
+            else:
+                title = None if game_attrs["title"] == "Fancade" else game_attrs["title"]
+                updated.append((game_url, title, game_attrs["image_url"], game_attrs["description"], game_attrs["author"]))
+
+            await asyncio.sleep(REFRESH_DELAY)
+
+        await self.bot.db.update_game_metadata(updated)
+        await self.bot.db.mark_games_deleted(deleted)
+        for game_url, title, *_ in updated:
+            if title is not None:
+                self.titles.retitle(game_url, title)
+
+        if updated or deleted:
+            self.log.info(f"Refreshed {len(updated)} submitted games, {len(deleted)} were deleted from Fancade.")
+
     @app_commands.command(name="get-source", description="Gets the source of the file and sends it to you.")
     @app_commands.describe(file_name="The name of the file you want to get the source of.")
     async def get_source(self, interaction: discord.Interaction, file_name: str) -> None:
@@ -0,0 +1,138 @@
+"""
+Helpers for running coroutines concurrently.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterable, TypeVar
+
+
+__all__ = (
+    "gather_or_cancel",
+    "gather_bounded",
+    "SingleFlight",
+    "Debouncer",
+)
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+def _consume_exception(task: asyncio.Future) -> None:
+    # avoids "exception was never retrieved" warnings for tasks that lost the race
+    if not task.cancelled():
+        task.exception()
+
+
+async def gather_or_cancel(*aws: Awaitable[Any]) -> list[Any]:
+    """Runs the awaitables concurrently and returns their results in order.
+
+    As soon as one of them raises, the others are cancelled and the exception is propagated.
+    """
+
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    for task in tasks:
+        task.add_done_callback(_consume_exception)
+
+    try:
+        return list(await asyncio.gather(*tasks))
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def gather_bounded(aws: Iterable[Awaitable[T]], limit: int) -> list[T | BaseException]:
+    """Runs the awaitables with at most ``limit`` of them in flight at once.
+
+    Results are returned in order, exceptions are returned in place of their result.
+    """
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return list(await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=True))
+
+
+class SingleFlight(Generic[K, T]):
+    """Coalesces concurrent calls for the same key into one in-flight task.
+
+    The first caller starts the task, everyone else asking for the same key
+    while it is running awaits that task instead of starting their own.
+    Cancelling a caller never cancels the shared task.
+    """
+
+    __slots__ = "calls", "coalesced", "_inflight"
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight: dict[K, asyncio.Future[T]] = {}
+
+    async def do(self, key: K, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            task.add_done_callback(_consume_exception)
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: K, task: asyncio.Future[T]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": len(self._inflight), "calls": self.calls, "coalesced": self.coalesced}
+
+
+class Debouncer(Generic[K, T]):
+    """Coalesces bursts of calls for the same key into one call every ``interval`` seconds.
+
+    :meth:`touch` stores the latest value for the key, the callback runs
+    with it once the window ends. Touching the key while the callback is
+    running opens the next window, so it never runs more often than that.
+    """
+
+    __slots__ = "callback", "interval", "_pending", "_tasks"
+
+    def __init__(self, callback: Callable[[K, T], Awaitable[Any]], interval: float) -> None:
+        self.callback = callback
+        self.interval = interval
+        self._pending: dict[K, T] = {}
+        self._tasks: dict[K, asyncio.Task[None]] = {}
+
+    def touch(self, key: K, value: T) -> None:
+        self._pending[key] = value
+        if key not in self._tasks:
+            task = self._tasks[key] = asyncio.create_task(self._run(key))
+            task.add_done_callback(_consume_exception)
+
+    def cancel(self, key: K) -> None:
+        self._pending.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def close(self) -> None:
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    async def _run(self, key: K) -> None:
+        try:
+            while key in self._pending:
+                await asyncio.sleep(self.interval)
+                if key in self._pending:
+                    await self.callback(key, self._pending.pop(key))
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
@@ -14,6 +14,8 @@ from cogs.errors import (
     SubmissionAlreadyExists,
     InvalidUrlError,
     GameNotFoundError,
+    FancadeUnavailableError,
+    TooManySubmissionsError,
     SubmissionNotInDatabase,
     NoSubmissionError
 )
@@ -39,6 +41,8 @@ class Group(app_commands.Group):
             SubmissionAlreadyExists |
             InvalidUrlError |
             GameNotFoundError |
+            FancadeUnavailableError |
+            TooManySubmissionsError |
             SubmissionNotInDatabase |
             NoSubmissionError
         ):
@@ -0,0 +1,204 @@
+"""
+In-memory and on-disk caches.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Generic, NamedTuple, Optional, TypeVar
+
+
+__all__ = (
+    "TTLCache",
+    "DiskCacheEntry",
+    "DiskCache",
+)
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """A size bounded LRU cache where every entry expires after its own TTL."""
+
+    __slots__ = "maxsize", "ttl", "hits", "misses", "evictions", "_data"
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K, default: Any = None) -> V | Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class DiskCacheEntry(NamedTuple):
+    value: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+
+class DiskCache:
+    """A persistent, size bounded cache of HTTP results stored in sqlite.
+
+    Values are stored as JSON along with the ETag and Last-Modified
+    validators needed to revalidate them. The least recently used
+    entries are dropped once there are more than ``max_entries``.
+
+    Reads don't write to disk, access times are kept in memory and saved
+    right before every eviction pass, the only place they are needed.
+    """
+
+    __slots__ = "path", "max_entries", "_connection", "_lock", "_writes", "_accessed"
+
+    EVICT_EVERY = 50
+
+    def __init__(self, path: str | Path, max_entries: int = 10_000) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._accessed: dict[str, float] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS http_cache_accessed_at_idx ON http_cache (accessed_at);")
+            self._connection = connection
+
+        return self._connection
+
+    def _get(self, key: str) -> Optional[DiskCacheEntry]:
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT value, etag, last_modified, expires_at FROM http_cache WHERE key = ?;",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._accessed[key] = time.time()
+
+        value, etag, last_modified, expires_at = row
+        return DiskCacheEntry(json.loads(value), etag, last_modified, expires_at)
+
+    def _set(self, key: str, value: Any, etag: Optional[str], last_modified: Optional[str], expires_at: float) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?, ?);",
+                (key, json.dumps(value), etag, last_modified, expires_at, time.time())
+            )
+            self._accessed.pop(key, None)
+
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._save_access_times(connection)
+                connection.execute(
+                    """
+                    DELETE FROM http_cache WHERE key IN (
+                        SELECT key FROM http_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    );
+                    """,
+                    (self.max_entries,)
+                )
+
+            connection.commit()
+
+    def _save_access_times(self, connection: sqlite3.Connection) -> None:
+        connection.executemany(
+            "UPDATE http_cache SET accessed_at = ? WHERE key = ?;",
+            [(accessed_at, key) for key, accessed_at in self._accessed.items()]
+        )
+        self._accessed.clear()
+
+    async def get(self, key: str) -> Optional[DiskCacheEntry]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        expires_at: float = 0.0
+    ) -> None:
+        await asyncio.to_thread(self._set, key, value, etag, last_modified, expires_at)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._save_access_times(self._connection)
+                self._connection.commit()
+                self._connection.close()
+                self._connection = None
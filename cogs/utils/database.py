@@ -0,0 +1,608 @@
+"""
+Data access layer for Odd Bot.
+
+Every query the bot runs lives here as a constant string. asyncpg keeps
+a per-connection cache of prepared statements keyed by the query text,
+so each statement is parsed and planned once per pooled connection and
+reused after that.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import datetime
+import contextlib
+from typing import Any, AsyncIterator, Iterable, Optional
+
+import asyncpg
+
+
+__all__ = (
+    "DEFAULT_TIMEOUTS",
+    "FIRST_PAGE_KEY",
+    "ClaimedPoll",
+    "Database",
+)
+
+# sorts before every (author_id, id), used to fetch the first page
+FIRST_PAGE_KEY = (-1, -1)
+
+# seconds, per class of query
+DEFAULT_TIMEOUTS = {
+    "read": 2.0,
+    "write": 5.0,
+    "bulk": 30.0
+}
+
+STATEMENT_CACHE_SIZE = 256
+
+
+# submissions
+FIND_SUBMISSION = """
+SELECT author_id, game_title, game_url, image_url FROM submission
+WHERE guild_id = $1 AND game_url = $2;
+"""
+
+FIND_SUBMITTED_URLS = """
+SELECT game_url FROM submission
+WHERE guild_id = $1 AND game_url = ANY($2::text[]);
+"""
+
+# returns the new row, or the row it conflicted with if it is visible to this statement
+INSERT_SUBMISSION = """
+WITH inserted AS (
+    INSERT INTO submission (author_id, guild_id, game_title, game_url, image_url, game_description, game_author)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+    ON CONFLICT (guild_id, game_url) DO NOTHING
+    RETURNING author_id, game_title
+)
+SELECT TRUE AS inserted, author_id, game_title FROM inserted
+UNION ALL
+SELECT FALSE AS inserted, author_id, game_title FROM submission
+WHERE guild_id = $2 AND game_url = $4 AND NOT EXISTS (SELECT 1 FROM inserted);
+"""
+
+INSERT_SUBMISSIONS = """
+INSERT INTO submission (author_id, guild_id, game_title, game_url, image_url, game_description, game_author)
+SELECT $1, $2, game.title, game.url, game.image_url, game.description, game.author
+FROM unnest($3::text[], $4::text[], $5::text[], $6::text[], $7::text[]) AS game(title, url, image_url, description, author)
+ON CONFLICT (guild_id, game_url) DO NOTHING
+RETURNING game_url;
+"""
+
+DELETE_SUBMISSION = """
+DELETE FROM submission
+WHERE guild_id = $1 AND game_url = $2
+RETURNING game_title;
+"""
+
+FETCH_GUILD_TITLES = "SELECT author_id, game_title, game_url FROM submission WHERE guild_id = $1;"
+
+# both conditions can use the trigram index, substring matches catch titles too short to be similar
+SEARCH_GUILD_SUBMISSIONS = """
+SELECT author_id, game_title, game_url, deleted, similarity(game_title, $2) AS score FROM submission
+WHERE guild_id = $1 AND (game_title % $2 OR game_title ILIKE $3)
+ORDER BY score DESC, id
+LIMIT $4;
+"""
+
+SEARCH_AUTHOR_SUBMISSIONS = """
+SELECT author_id, game_title, game_url, deleted, similarity(game_title, $2) AS score FROM submission
+WHERE guild_id = $1 AND author_id = $5 AND (game_title % $2 OR game_title ILIKE $3)
+ORDER BY score DESC, id
+LIMIT $4;
+"""
+
+COUNT_GUILD_SUBMISSIONS = "SELECT COUNT(*) FROM submission WHERE guild_id = $1;"
+
+COUNT_AUTHOR_SUBMISSIONS = "SELECT COUNT(*) FROM submission WHERE guild_id = $1 AND author_id = $2;"
+
+# keyset pagination, the page starts right after the given (author_id, id)
+FETCH_GUILD_SUBMISSIONS_PAGE = """
+SELECT id, author_id, game_title, game_url, deleted FROM submission
+WHERE guild_id = $1 AND (author_id, id) > ($2, $3)
+ORDER BY author_id, id
+LIMIT $4;
+"""
+
+FETCH_AUTHOR_SUBMISSIONS_PAGE = """
+SELECT id, author_id, game_title, game_url, deleted FROM submission
+WHERE guild_id = $1 AND author_id = $2 AND id > $3
+ORDER BY id
+LIMIT $4;
+"""
+
+# deleted a chunk at a time so a mass clear never locks every row at once
+# = ANY(ARRAY(...)) looks the chunk up by primary key, an IN (...) semi-join may scan the table
+DELETE_GUILD_SUBMISSIONS = """
+DELETE FROM submission WHERE id = ANY(ARRAY(
+    SELECT id FROM submission WHERE guild_id = $1 LIMIT $2
+));
+"""
+
+DELETE_AUTHOR_SUBMISSIONS = """
+DELETE FROM submission WHERE id = ANY(ARRAY(
+    SELECT id FROM submission WHERE guild_id = $1 AND author_id = $3 LIMIT $2
+));
+"""
+
+# games marked as deleted are re-checked too, less often, in case Fancade answered wrong
+FETCH_STALE_GAME_URLS = """
+SELECT game_url FROM (
+    SELECT game_url, checked_at FROM submission
+    WHERE NOT deleted AND checked_at < now() - $1::interval
+    UNION ALL
+    SELECT game_url, checked_at FROM submission
+    WHERE deleted AND checked_at < now() - $3::interval
+) AS stale
+GROUP BY game_url
+ORDER BY MIN(checked_at)
+LIMIT $2;
+"""
+
+UPDATE_GAME_METADATA = """
+UPDATE submission
+SET game_title = COALESCE($2, game_title), image_url = $3, game_description = $4,
+    game_author = $5, checked_at = now(), deleted = FALSE
+WHERE game_url = $1;
+"""
+
+MARK_GAME_DELETED = "UPDATE submission SET deleted = TRUE, checked_at = now() WHERE game_url = $1;"
+
+# polls
+FETCH_POLLS = """
+SELECT poll.id AS poll_id, poll.message_id, poll.channel_id, poll.deadline,
+    poll_options.id AS option_id, poll_options.option_emoji, poll_options.option_text,
+    ARRAY(SELECT member_id FROM poll_votes WHERE poll_votes.option_id = poll_options.id) AS voter_ids
+FROM poll
+JOIN poll_options ON poll_options.poll_id = poll.id
+WHERE poll.ended_at IS NULL
+ORDER BY poll.id, poll_options.id;
+"""
+
+FETCH_POLL = """
+SELECT poll.id AS poll_id, poll.message_id, poll.channel_id, poll.deadline,
+    poll_options.id AS option_id, poll_options.option_emoji, poll_options.option_text,
+    ARRAY(SELECT member_id FROM poll_votes WHERE poll_votes.option_id = poll_options.id) AS voter_ids
+FROM poll
+JOIN poll_options ON poll_options.poll_id = poll.id
+WHERE poll.message_id = $1 AND poll.ended_at IS NULL
+ORDER BY poll_options.id;
+"""
+
+# the poll and its options in one statement, returned in the same shape as FETCH_POLL
+INSERT_POLL = """
+WITH new_poll AS (
+    INSERT INTO poll (message_id, channel_id, guild_id, deadline) VALUES ($1, $2, $3, $4)
+    RETURNING id, message_id, channel_id, deadline
+), new_options AS (
+    INSERT INTO poll_options (poll_id, option_emoji, option_text)
+    SELECT new_poll.id, option.emoji, option.text
+    FROM new_poll, unnest($5::text[], $6::text[]) WITH ORDINALITY AS option(emoji, text, position)
+    ORDER BY option.position
+    RETURNING id, poll_id, option_emoji, option_text
+)
+SELECT new_poll.id AS poll_id, new_poll.message_id, new_poll.channel_id, new_poll.deadline,
+    new_options.id AS option_id, new_options.option_emoji, new_options.option_text,
+    '{}'::bigint[] AS voter_ids
+FROM new_options
+JOIN new_poll ON new_poll.id = new_options.poll_id
+ORDER BY new_options.id;
+"""
+
+# waits for anyone else ending the poll, ended_at is re-checked once the lock is acquired
+CLAIM_POLL = """
+SELECT id, message_id, channel_id, deadline FROM poll
+WHERE message_id = $1 AND ended_at IS NULL
+FOR UPDATE;
+"""
+
+# polls created before guild_id was stored fall back to the guild passed in
+ARCHIVE_POLL = """
+INSERT INTO poll_archive (
+    poll_id, message_id, channel_id, guild_id, deadline, ended_early,
+    option_emojis, option_texts, vote_counts, winner
+)
+SELECT poll.id, poll.message_id, poll.channel_id, COALESCE(poll.guild_id, $2), poll.deadline, $3,
+    ARRAY_AGG(poll_options.option_emoji ORDER BY poll_options.id),
+    ARRAY_AGG(poll_options.option_text ORDER BY poll_options.id),
+    ARRAY_AGG(poll_options.vote_count ORDER BY poll_options.id),
+    $4
+FROM poll
+JOIN poll_options ON poll_options.poll_id = poll.id
+WHERE poll.id = $1
+GROUP BY poll.id;
+"""
+
+END_POLL = "UPDATE poll SET ended_at = now() WHERE id = $1;"
+
+# only one caller gets the archived results back, a failed announcement is released to be retried
+CLAIM_POLL_ANNOUNCEMENT = """
+WITH claimed AS (
+    UPDATE poll SET announced_at = now()
+    WHERE id = $1 AND ended_at IS NOT NULL AND announced_at IS NULL
+    RETURNING id
+)
+SELECT poll_archive.message_id, poll_archive.channel_id, poll_archive.deadline, poll_archive.ended_early,
+    poll_archive.option_emojis, poll_archive.option_texts, poll_archive.vote_counts, poll_archive.winner
+FROM poll_archive
+JOIN claimed ON claimed.id = poll_archive.poll_id;
+"""
+
+RELEASE_POLL_ANNOUNCEMENT = "UPDATE poll SET announced_at = NULL WHERE id = $1;"
+
+# released after a failed announcement, or ended by a process that stopped before it could announce them.
+# Uses a partial index.
+FETCH_UNANNOUNCED_POLLS = "SELECT id FROM poll WHERE ended_at IS NOT NULL AND announced_at IS NULL;"
+
+FETCH_POLL_ENDED = "SELECT ended_at IS NOT NULL FROM poll WHERE message_id = $1;"
+
+# ended polls keep their votes until they are purged a batch at a time, oldest poll first.
+# Walking the ended polls by ended_at and their votes by poll_id keeps both on an index
+# even when most of the table has ended.
+PURGE_ENDED_POLL_VOTES = """
+DELETE FROM poll_votes WHERE id = ANY(ARRAY(
+    SELECT vote.id FROM poll
+    CROSS JOIN LATERAL (SELECT id FROM poll_votes WHERE poll_votes.poll_id = poll.id LIMIT $1) AS vote
+    WHERE poll.ended_at IS NOT NULL
+    ORDER BY poll.ended_at
+    LIMIT $1
+));
+"""
+
+DELETE_PURGED_POLLS = """
+DELETE FROM poll WHERE id = ANY(ARRAY(
+    SELECT id FROM poll
+    WHERE ended_at IS NOT NULL AND announced_at IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM poll_votes WHERE poll_votes.poll_id = poll.id
+    )
+    ORDER BY ended_at
+    LIMIT $1
+));
+"""
+
+FETCH_POLL_HISTORY = """
+SELECT message_id, channel_id, ended_at, ended_early,
+    option_emojis[winner] AS option_emoji, option_texts[winner] AS option_text,
+    vote_counts[winner] AS vote_count
+FROM poll_archive
+WHERE guild_id = $1
+ORDER BY ended_at DESC
+LIMIT $2;
+"""
+
+# votes for options of ended or deleted polls are dropped by the joins. The open polls are
+# locked first, that waits for a poll being ended and then re-checks ended_at, so a vote
+# can't slip in after the results were archived.
+RECORD_VOTES = """
+WITH open_poll AS (
+    SELECT id FROM poll
+    WHERE id = ANY($2::integer[]) AND ended_at IS NULL
+    ORDER BY id
+    FOR KEY SHARE
+)
+INSERT INTO poll_votes (member_id, poll_id, option_id)
+SELECT vote.member_id, vote.poll_id, vote.option_id
+FROM unnest($1::bigint[], $2::integer[], $3::integer[]) AS vote(member_id, poll_id, option_id)
+JOIN poll_options ON poll_options.id = vote.option_id AND poll_options.poll_id = vote.poll_id
+JOIN open_poll ON open_poll.id = vote.poll_id
+ON CONFLICT (member_id, poll_id)
+DO UPDATE SET option_id = EXCLUDED.option_id
+WHERE poll_votes.option_id IS DISTINCT FROM EXCLUDED.option_id;
+"""
+
+# vote_count is kept up to date by a trigger on poll_votes
+FETCH_POLL_RESULTS = """
+SELECT poll_options.option_emoji, poll_options.option_text, poll_options.vote_count
+FROM poll_options
+JOIN poll ON poll.id = poll_options.poll_id
+WHERE poll.message_id = $1
+ORDER BY poll_options.id;
+"""
+
+# info
+DATABASE_INFO = """
+SELECT
+    version() AS version,
+    extract(epoch FROM now() - pg_postmaster_start_time())::integer AS uptime,
+    pg_size_pretty(pg_database_size(current_database())) AS size,
+    (SELECT count(pid) FROM pg_stat_activity WHERE state = 'active') AS active_connections;
+"""
+
+
+class ClaimedPoll:
+    """A poll locked by :meth:`Database.claim_poll`."""
+
+    __slots__ = "db", "connection", "poll", "results"
+
+    def __init__(self, db: "Database", connection: asyncpg.Connection, poll: asyncpg.Record, results: list[asyncpg.Record]) -> None:
+        self.db = db
+        self.connection = connection
+        self.poll = poll
+        self.results = results
+
+    async def end(self, guild_id: Optional[int], winner: int, ended_early: bool = False) -> None:
+        """Archives the poll's results and marks it as ended, ``winner`` is the winning option's index in :attr:`results`.
+
+        ``guild_id`` is only used for polls created before their guild was stored.
+        """
+
+        await self.connection.execute(
+            ARCHIVE_POLL, self.poll["id"], guild_id, ended_early, winner + 1, timeout=self.db.timeouts["write"]
+        )
+        await self.connection.execute(END_POLL, self.poll["id"], timeout=self.db.timeouts["write"])
+
+
+class Database:
+    """Typed access to every query the bot runs.
+
+    Queries are grouped into read, write and bulk classes, each with its own timeout.
+    """
+
+    __slots__ = "pool", "timeouts"
+
+    def __init__(self, pool: asyncpg.Pool, timeouts: Optional[dict[str, float]] = None) -> None:
+        self.pool = pool
+        self.timeouts = DEFAULT_TIMEOUTS | (timeouts or {})
+
+    @classmethod
+    async def create(
+        cls,
+        dsn: str,
+        *,
+        min_size: int = 2,
+        max_size: int = 10,
+        timeouts: Optional[dict[str, float]] = None
+    ) -> "Database":
+        pool = await asyncpg.create_pool(
+            dsn=dsn,
+            min_size=min_size,
+            max_size=max_size,
+            statement_cache_size=STATEMENT_CACHE_SIZE
+        )
+        assert pool
+        return cls(pool, timeouts)
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    # submissions
+    async def find_submission(self, guild_id: int, game_url: str) -> Optional[asyncpg.Record]:
+        return await self.pool.fetchrow(FIND_SUBMISSION, guild_id, game_url, timeout=self.timeouts["read"])
+
+    async def find_submitted_urls(self, guild_id: int, game_urls: list[str]) -> list[str]:
+        results = await self.pool.fetch(FIND_SUBMITTED_URLS, guild_id, game_urls, timeout=self.timeouts["read"])
+        return [result["game_url"] for result in results]
+
+    async def insert_submission(
+        self,
+        author_id: int,
+        guild_id: int,
+        game_url: str,
+        game_attrs: dict[str, Any]
+    ) -> Optional[asyncpg.Record]:
+        """Inserts the submission unless the guild already has it, in a single round-trip.
+
+        Returns a record with ``inserted``, ``author_id`` and ``game_title``. When the
+        game was already submitted those belong to the existing submission. Returns
+        None if a concurrent submission won the race and isn't visible yet.
+        """
+
+        return await self.pool.fetchrow(
+            INSERT_SUBMISSION,
+            author_id,
+            guild_id,
+            game_attrs["title"],
+            game_url,
+            game_attrs["image_url"],
+            game_attrs["description"],
+            game_attrs["author"],
+            timeout=self.timeouts["write"]
+        )
+
+    async def insert_submissions(self, author_id: int, guild_id: int, games: Iterable[tuple[str, dict[str, Any]]]) -> list[str]:
+        """Inserts every game in one statement, skipping ones the guild already has. Returns the inserted URLs."""
+
+        games = list(games)
+        results = await self.pool.fetch(
+            INSERT_SUBMISSIONS,
+            author_id,
+            guild_id,
+            [game_attrs["title"] for _, game_attrs in games],
+            [game_url for game_url, _ in games],
+            [game_attrs["image_url"] for _, game_attrs in games],
+            [game_attrs["description"] for _, game_attrs in games],
+            [game_attrs["author"] for _, game_attrs in games],
+            timeout=self.timeouts["bulk"]
+        )
+        return [result["game_url"] for result in results]
+
+    async def delete_submission(self, guild_id: int, game_url: str) -> Optional[str]:
+        """Deletes the guild's submission and returns its title, None if there was nothing to delete."""
+
+        return await self.pool.fetchval(DELETE_SUBMISSION, guild_id, game_url, timeout=self.timeouts["write"])
+
+    async def fetch_titles(self, guild_id: int) -> list[asyncpg.Record]:
+        return await self.pool.fetch(FETCH_GUILD_TITLES, guild_id, timeout=self.timeouts["bulk"])
+
+    async def search_submissions(
+        self,
+        guild_id: int,
+        query: str,
+        limit: int = 10,
+        author_id: Optional[int] = None
+    ) -> list[asyncpg.Record]:
+        """Returns the submissions whose title best matches ``query``, most similar first."""
+
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        if author_id is None:
+            return await self.pool.fetch(
+                SEARCH_GUILD_SUBMISSIONS, guild_id, query, pattern, limit, timeout=self.timeouts["read"]
+            )
+
+        return await self.pool.fetch(
+            SEARCH_AUTHOR_SUBMISSIONS, guild_id, query, pattern, limit, author_id, timeout=self.timeouts["read"]
+        )
+
+    async def count_submissions(self, guild_id: int, author_id: Optional[int] = None) -> int:
+        if author_id is None:
+            return await self.pool.fetchval(COUNT_GUILD_SUBMISSIONS, guild_id, timeout=self.timeouts["read"])
+
+        return await self.pool.fetchval(COUNT_AUTHOR_SUBMISSIONS, guild_id, author_id, timeout=self.timeouts["read"])
+
+    async def fetch_submissions_page(
+        self,
+        guild_id: int,
+        after: tuple[int, int] = FIRST_PAGE_KEY,
+        limit: int = 10,
+        author_id: Optional[int] = None
+    ) -> list[asyncpg.Record]:
+        """Returns up to ``limit`` submissions ordered by (author_id, id) that come after ``after``."""
+
+        last_author_id, last_id = after
+        if author_id is None:
+            return await self.pool.fetch(
+                FETCH_GUILD_SUBMISSIONS_PAGE, guild_id, last_author_id, last_id, limit, timeout=self.timeouts["read"]
+            )
+
+        return await self.pool.fetch(
+            FETCH_AUTHOR_SUBMISSIONS_PAGE, guild_id, author_id, last_id, limit, timeout=self.timeouts["read"]
+        )
+
+    async def delete_submissions(self, guild_id: int, author_id: Optional[int] = None, limit: int = 500) -> int:
+        """Deletes up to ``limit`` of the submissions and returns how many were deleted."""
+
+        if author_id is None:
+            status = await self.pool.execute(DELETE_GUILD_SUBMISSIONS, guild_id, limit, timeout=self.timeouts["write"])
+        else:
+            status = await self.pool.execute(DELETE_AUTHOR_SUBMISSIONS, guild_id, limit, author_id, timeout=self.timeouts["write"])
+
+        return int(status.split()[-1])
+
+    async def fetch_stale_game_urls(
+        self,
+        stale_after: datetime.timedelta,
+        limit: int,
+        deleted_stale_after: datetime.timedelta
+    ) -> list[str]:
+        """Returns the games checked longest ago, ones marked as deleted once ``deleted_stale_after`` has passed."""
+
+        results = await self.pool.fetch(
+            FETCH_STALE_GAME_URLS, stale_after, limit, deleted_stale_after, timeout=self.timeouts["read"]
+        )
+        return [result["game_url"] for result in results]
+
+    async def update_game_metadata(
+        self,
+        games: list[tuple[str, Optional[str], Optional[str], Optional[str], Optional[str]]]
+    ) -> None:
+        """Takes (game_url, title, image_url, description, author) rows, a None title keeps the stored one."""
+
+        await self.pool.executemany(UPDATE_GAME_METADATA, games, timeout=self.timeouts["bulk"])
+
+    async def mark_games_deleted(self, game_urls: list[str]) -> None:
+        await self.pool.executemany(MARK_GAME_DELETED, [(game_url,) for game_url in game_urls], timeout=self.timeouts["bulk"])
+
+    # polls
+    async def fetch_polls(self) -> list[asyncpg.Record]:
+        """Returns one row per option of every open poll."""
+
+        return await self.pool.fetch(FETCH_POLLS, timeout=self.timeouts["bulk"])
+
+    async def fetch_poll(self, message_id: int) -> list[asyncpg.Record]:
+        return await self.pool.fetch(FETCH_POLL, message_id, timeout=self.timeouts["read"])
+
+    async def create_poll(
+        self,
+        message_id: int,
+        channel_id: int,
+        guild_id: int,
+        deadline: datetime.datetime,
+        options: dict[str, str]
+    ) -> list[asyncpg.Record]:
+        """Inserts the poll with its options and returns them in the same shape as :meth:`fetch_poll`."""
+
+        return await self.pool.fetch(
+            INSERT_POLL,
+            message_id,
+            channel_id,
+            guild_id,
+            deadline,
+            list(options.keys()),
+            list(options.values()),
+            timeout=self.timeouts["write"]
+        )
+
+    @contextlib.asynccontextmanager
+    async def claim_poll(self, message_id: int) -> AsyncIterator[Optional["ClaimedPoll"]]:
+        """Locks the poll for closing and yields it with its results.
+
+        Yields None if the poll doesn't exist or has ended, a poll someone else is
+        ending is waited on and then counts as ended. The poll only ends if
+        :meth:`ClaimedPoll.end` is awaited, if the block raises the lock is released
+        and the poll stays open. Votes for the poll wait on the lock, so keep the
+        block free of anything but queries.
+        """
+
+        async with self.pool.acquire() as connection, connection.transaction():
+            poll = await connection.fetchrow(CLAIM_POLL, message_id, timeout=self.timeouts["read"])
+            if poll is None:
+                yield None
+                return
+
+            results = await connection.fetch(FETCH_POLL_RESULTS, message_id, timeout=self.timeouts["read"])
+            yield ClaimedPoll(self, connection, poll, results)
+
+    async def claim_poll_announcement(self, poll_id: int) -> Optional[asyncpg.Record]:
+        """Returns the ended poll's archived results, or None if it isn't ended or someone already claimed them."""
+
+        return await self.pool.fetchrow(CLAIM_POLL_ANNOUNCEMENT, poll_id, timeout=self.timeouts["write"])
+
+    async def release_poll_announcement(self, poll_id: int) -> None:
+        """Marks the ended poll as unannounced again so it can be claimed by the next attempt."""
+
+        await self.pool.execute(RELEASE_POLL_ANNOUNCEMENT, poll_id, timeout=self.timeouts["write"])
+
+    async def fetch_unannounced_polls(self) -> list[int]:
+        results = await self.pool.fetch(FETCH_UNANNOUNCED_POLLS, timeout=self.timeouts["read"])
+        return [result["id"] for result in results]
+
+    async def poll_ended(self, message_id: int) -> Optional[bool]:
+        """Returns whether the poll has ended, None if there is no such poll."""
+
+        return await self.pool.fetchval(FETCH_POLL_ENDED, message_id, timeout=self.timeouts["read"])
+
+    async def purge_ended_polls(self, limit: int = 1000) -> int:
+        """Deletes up to ``limit`` votes of ended polls and returns how many were deleted.
+
+        Up to ``limit`` announced polls with no votes left are deleted once there is nothing more to purge.
+        """
+
+        status = await self.pool.execute(PURGE_ENDED_POLL_VOTES, limit, timeout=self.timeouts["write"])
+        deleted = int(status.split()[-1])
+        if deleted < limit:
+            await self.pool.execute(DELETE_PURGED_POLLS, limit, timeout=self.timeouts["write"])
+
+        return deleted
+
+    async def fetch_poll_history(self, guild_id: int, limit: int = 10) -> list[asyncpg.Record]:
+        """Returns the guild's most recently ended polls with their winning option."""
+
+        return await self.pool.fetch(FETCH_POLL_HISTORY, guild_id, limit, timeout=self.timeouts["read"])
+
+    async def record_votes(self, votes: list[tuple[int, int, int]]) -> None:
+        """Upserts (member_id, poll_id, option_id) rows in one statement, each member and poll may only appear once."""
+
+        await self.pool.execute(
+            RECORD_VOTES,
+            [member_id for member_id, _, _ in votes],
+            [poll_id for _, poll_id, _ in votes],
+            [option_id for _, _, option_id in votes],
+            timeout=self.timeouts["bulk"]
+        )
+
+    # info
+    async def database_info(self) -> asyncpg.Record:
+        result = await self.pool.fetchrow(DATABASE_INFO, timeout=self.timeouts["read"])
+        assert result
+        return result
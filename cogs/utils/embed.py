@@ -5,7 +5,7 @@ Utility functions for embeds.
 :license: MIT, see LICENSE for more details.
 """
 
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 import discord
 
@@ -53,34 +53,46 @@ async def send_error_embed(interaction: discord.Interaction, message: str) -> No
 
 
 class EmbedPaginator(discord.ui.View):
+    """Paginates embeds that are built on demand.
 
-    __slots__ = "interaction", "author", "embeds", "current_page", "max_pages"
+    ``get_page`` is called with the zero-based page index every time a page is shown.
+    """
 
-    def __init__(self, interaction: discord.Interaction, embeds: list[discord.Embed]) -> None:
+    __slots__ = "interaction", "author", "get_page", "current_page", "current_embed", "max_pages"
+
+    def __init__(
+        self,
+        interaction: discord.Interaction,
+        max_pages: int,
+        get_page: Callable[[int], Awaitable[discord.Embed]]
+    ) -> None:
         super().__init__(timeout=None)
         self.current_page = 0
-        self.max_pages = len(embeds)
+        self.current_embed: Optional[discord.Embed] = None
+        self.max_pages = max_pages
         self.interaction = interaction
         self.author = interaction.user
-        self.embeds = embeds
+        self.get_page = get_page
 
-    @property
-    def index_page(self) -> discord.Embed:
+    async def _load_page(self) -> discord.Embed:
+        embed = await self.get_page(self.current_page)
+        embed.set_footer(text=f"Page {self.current_page + 1}/{self.max_pages}")
+        self.current_embed = embed
+        return embed
+
+    async def index_page(self) -> discord.Embed:
         if self.max_pages > 1:
             self.next.disabled = False
 
-        embed = self.embeds[0]
-        embed.set_footer(text=f"Page {self.current_page + 1}/{self.max_pages}")
-        return embed
+        return await self._load_page()
 
     @discord.ui.button(label="Previous Page", style=discord.ButtonStyle.blurple, custom_id="prev_page:button", disabled=True, emoji=LEFT_ARROW)
     async def prev(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
         button.disabled = self.current_page - 1 == 0
         self.next.disabled = False
         self.current_page -= 1
-        
-        embed = self.embeds[self.current_page]
-        embed.set_footer(text=f"Page {self.current_page + 1}/{self.max_pages}")
+
+        embed = await self._load_page()
         await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label="Next Page", style=discord.ButtonStyle.blurple, custom_id="next_page:button", disabled=True, emoji=RIGHT_ARROW)
@@ -89,14 +101,12 @@ class EmbedPaginator(discord.ui.View):
         self.prev.disabled = False
         self.current_page += 1
 
-        embed = self.embeds[self.current_page]
-        embed.set_footer(text=f"Page {self.current_page + 1}/{self.max_pages}")
+        embed = await self._load_page()
         await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label="Quit", style=discord.ButtonStyle.red, custom_id="quit:button", emoji=RED_TICK, row=2)
     async def quit_button(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
-        embed = self.embeds[self.current_page]
-        embed.set_footer(text=f"Page {self.current_page + 1}/{self.max_pages}")
+        embed = self.current_embed or await self._load_page()
         await interaction.response.edit_message(embed=embed, view=None)
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
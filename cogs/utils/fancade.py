@@ -0,0 +1,417 @@
+"""
+Scraping helpers for Fancade games.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import re
+import time
+import asyncio
+import codecs
+from enum import Enum
+from html.parser import HTMLParser
+from typing import Any, Optional
+
+import aiohttp
+
+from cogs import errors
+from cogs.utils.aio import gather_or_cancel, SingleFlight
+from cogs.utils.cache import TTLCache, DiskCache, DiskCacheEntry
+from cogs.utils.ratelimit import TokenBucket, CircuitBreaker
+
+
+__all__ = (
+    "GAME_URL",
+    "IMAGE_URL",
+    "GameStatus",
+    "GamePageParser",
+    "game_exists_check",
+    "get_game_attrs",
+    "FancadeClient"
+)
+
+GAME_URL = "https://play.fancade.com/{}"
+IMAGE_URL = "https://www.fancade.com/images/{}.jpg"
+
+PAGE_CHUNK_SIZE = 4 * 1024
+MAX_PAGE_BYTES = 256 * 1024
+# unread bodies up to this size are drained so the connection goes back to the pool
+MAX_DRAIN_BYTES = 64 * 1024
+
+PROBE_BYTES = 16
+JPEG_MAGIC = b"\xff\xd8\xff"
+
+DEFAULT_FRESHNESS = 10 * 60
+DEFAULT_NEGATIVE_TTL = 5 * 60
+MAX_AGE_REGEX = re.compile(r"max-age=(\d+)")
+
+_MISSING = object()
+
+
+class GameStatus(Enum):
+    exists = "exists"
+    missing = "missing"
+    unknown = "unknown"
+
+
+class GamePageParser(HTMLParser):
+    """Incrementally pulls the title, og:image, description and author out of a game page.
+
+    Feed it raw chunks with :meth:`feed_chunk` and stop once it returns True,
+    the rest of the document is never parsed and no tree is built.
+    """
+
+    def __init__(self, encoding: str = "utf-8", max_bytes: int = MAX_PAGE_BYTES) -> None:
+        super().__init__(convert_charrefs=True)
+        self.title: Optional[str] = None
+        self.image_url: Optional[str] = None
+        self.description: Optional[str] = None
+        self.author: Optional[str] = None
+        self.bytes_read = 0
+        self.max_bytes = max_bytes
+
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._capturing: Optional[str] = None
+        self._buffer: list[str] = []
+
+    @property
+    def done(self) -> bool:
+        return None not in (self.title, self.image_url, self.description, self.author)
+
+    def feed_chunk(self, chunk: bytes) -> bool:
+        """Feeds a chunk of the page, returns True when there is no need to read any further."""
+
+        self.bytes_read += len(chunk)
+        self.feed(self._decoder.decode(chunk))
+        return self.done or self.bytes_read >= self.max_bytes
+
+    def close(self) -> None:
+        self.feed(self._decoder.decode(b"", final=True))
+        super().close()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"title": self.title, "image_url": self.image_url, "description": self.description, "author": self.author}
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        if self._capturing is not None:
+            return None
+
+        if tag == "title" and self.title is None:
+            self._capturing = "title"
+
+        elif tag == "p" and self.author is None:
+            classes = (dict(attrs).get("class") or "").split()
+            if "author" in classes:
+                self._capturing = "author"
+
+        elif tag == "meta":
+            attributes = dict(attrs)
+            if attributes.get("property") == "og:image" and self.image_url is None:
+                self.image_url = attributes.get("content")
+
+            elif attributes.get("name") == "description" and self.description is None:
+                self.description = attributes.get("content")
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._capturing is None or tag != ("title" if self._capturing == "title" else "p"):
+            return None
+
+        setattr(self, self._capturing, "".join(self._buffer).strip())
+        self._capturing = None
+        self._buffer.clear()
+
+    def handle_data(self, data: str) -> None:
+        if self._capturing is not None:
+            self._buffer.append(data)
+
+
+def _conditional_headers(entry: Optional[DiskCacheEntry]) -> dict[str, str]:
+    headers = {}
+    if entry is not None:
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    return headers
+
+
+async def _drain(response: aiohttp.ClientResponse, max_bytes: int = MAX_DRAIN_BYTES) -> None:
+    """Reads and discards the rest of the body, larger leftovers are left for aiohttp to close."""
+
+    drained = 0
+    while drained < max_bytes and not response.content.at_eof():
+        chunk = await response.content.read(PAGE_CHUNK_SIZE)
+        if not chunk:
+            break
+
+        drained += len(chunk)
+
+
+def _validators(response: aiohttp.ClientResponse) -> tuple[Optional[str], Optional[str], float]:
+    """Returns the ETag, Last-Modified and the time until which the response is fresh."""
+
+    cache_control = response.headers.get("Cache-Control", "")
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        freshness = 0
+    elif (match := MAX_AGE_REGEX.search(cache_control)) is not None:
+        freshness = int(match.group(1))
+    else:
+        freshness = DEFAULT_FRESHNESS
+
+    return response.headers.get("ETag"), response.headers.get("Last-Modified"), time.time() + freshness
+
+
+def _negative_validators(
+    validators: tuple[Optional[str], Optional[str], float],
+    negative_ttl: float
+) -> tuple[Optional[str], Optional[str], float]:
+    """Keeps a "game doesn't exist" answer fresh for no longer than ``negative_ttl``."""
+
+    etag, last_modified, expires_at = validators
+    return etag, last_modified, min(expires_at, time.time() + negative_ttl)
+
+
+async def game_exists_check(
+    session: aiohttp.ClientSession,
+    game_id: str,
+    image_url: str = IMAGE_URL,
+    disk_cache: Optional[DiskCache] = None,
+    negative_ttl: float = DEFAULT_NEGATIVE_TTL
+) -> GameStatus:
+    """Checks whether the game has a thumbnail without downloading the whole image.
+
+    Only the first few bytes are requested, a game exists if they come back
+    as an image. Network errors and server errors are reported as unknown.
+    With a disk cache, fresh results are served locally and stale ones are revalidated,
+    missing games are kept fresh for at most ``negative_ttl``.
+    """
+
+    url = image_url.format(game_id)
+    entry = await disk_cache.get(url) if disk_cache is not None else None
+    if entry is not None and entry.fresh:
+        return GameStatus(entry.value)
+
+    headers = {"Range": f"bytes=0-{PROBE_BYTES - 1}", **_conditional_headers(entry)}
+    try:
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and entry is not None:
+                status = GameStatus(entry.value)
+
+            elif response.status in (404, 410):
+                status = GameStatus.missing
+
+            elif response.status not in (200, 206):
+                return GameStatus.unknown
+
+            elif response.content_type.startswith("image/"):
+                status = GameStatus.exists
+
+            else:
+                # fancade answers unknown images with a "Page Not Found" html page
+                head = await response.content.read(PROBE_BYTES)
+                status = GameStatus.exists if head.startswith(JPEG_MAGIC) else GameStatus.missing
+
+            await _drain(response)
+
+            validators = _validators(response)
+            if status is GameStatus.missing:
+                validators = _negative_validators(validators, negative_ttl)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return GameStatus.unknown
+
+    if disk_cache is not None:
+        await disk_cache.set(url, status.value, *validators)
+
+    return status
+
+
+async def get_game_attrs(
+    session: aiohttp.ClientSession,
+    game_url: str,
+    disk_cache: Optional[DiskCache] = None,
+    negative_ttl: float = DEFAULT_NEGATIVE_TTL
+) -> dict[str, Any]:
+    """Returns the game page's title, image_url, description and author.
+
+    Untitled pages, which is also what fancade serves for games that don't exist,
+    are kept fresh in the disk cache for at most ``negative_ttl``.
+
+    Responses other than 2xx (or a 304 for a cached page) raise :class:`aiohttp.ClientResponseError`,
+    a page without the expected meta tags raises :class:`errors.FancadeUnavailableError`.
+    """
+
+    entry = await disk_cache.get(game_url) if disk_cache is not None else None
+    if entry is not None and entry.fresh:
+        return entry.value
+
+    async with session.get(game_url, headers=_conditional_headers(entry)) as response:
+        validators = _validators(response)
+        if response.status == 304 and entry is not None:
+            game_attrs = entry.value
+
+        elif not 200 <= response.status < 300:
+            # error and rate limit pages (429, 403, ...) have nothing worth parsing
+            raise aiohttp.ClientResponseError(
+                response.request_info,
+                response.history,
+                status=response.status,
+                message=response.reason or "",
+                headers=response.headers
+            )
+
+        else:
+            parser = GamePageParser(response.charset or "utf-8")
+            async for chunk in response.content.iter_chunked(PAGE_CHUNK_SIZE):
+                if parser.feed_chunk(chunk):
+                    break
+
+            parser.close()
+            await _drain(response)
+
+            if parser.image_url is None or parser.description is None:
+                raise errors.FancadeUnavailableError("I couldn't read that game's page, please try again later.")
+
+            game_attrs = parser.to_dict()
+
+        if game_attrs["title"] == "Fancade":
+            validators = _negative_validators(validators, negative_ttl)
+
+    if disk_cache is not None:
+        await disk_cache.set(game_url, game_attrs, *validators)
+
+    return game_attrs
+
+
+class FancadeClient:
+    """Fetches game metadata through the bot's shared session.
+
+    Results are cached by game ID, games that don't exist are cached
+    for a shorter time so a newly published game shows up quickly.
+    Concurrent lookups of the same game share one request.
+
+    Outbound requests go through an adaptive token bucket and a circuit
+    breaker, when Fancade keeps failing lookups fail fast instead of
+    piling up on the event loop. An optional disk cache keeps pages and
+    probe results across restarts and revalidates them with conditional requests.
+    """
+
+    __slots__ = "session", "cache", "negative_ttl", "inflight", "limiter", "breaker", "max_wait", "game_url", "image_url", "disk_cache"
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        cache_size: int = 1024,
+        ttl: float = 60 * 60,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+        rate: float = 5.0,
+        burst: float = 10.0,
+        max_wait: float = 5.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        game_url: str = GAME_URL,
+        image_url: str = IMAGE_URL,
+        disk_cache: Optional[DiskCache] = None
+    ) -> None:
+        self.session = session
+        self.cache: TTLCache[str, Optional[dict[str, Any]]] = TTLCache(cache_size, ttl)
+        self.negative_ttl = negative_ttl
+        self.inflight: SingleFlight[str, Optional[dict[str, Any]]] = SingleFlight()
+        self.limiter = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_wait = max_wait
+        self.game_url = game_url
+        self.image_url = image_url
+        self.disk_cache = disk_cache
+
+    async def get_game(self, game_id: str, *, refresh: bool = False) -> Optional[dict[str, Any]]:
+        """Returns the game's title, image_url, description and author or None if the game doesn't exist.
+
+        Passing ``refresh`` skips the cache lookup but still stores the fresh result.
+        """
+
+        game_attrs = _MISSING if refresh else self.cache.get(game_id, _MISSING)
+        if game_attrs is _MISSING:
+            game_attrs = await self.inflight.do(game_id, lambda: self._load_game(game_id))
+
+        return None if game_attrs is None else dict(game_attrs)
+
+    async def _load_game(self, game_id: str) -> Optional[dict[str, Any]]:
+        game_attrs = await self._fetch_game(game_id)
+        if game_attrs is None:
+            self.cache.set(game_id, None, ttl=self.negative_ttl)
+        else:
+            self.cache.set(game_id, game_attrs)
+
+        return game_attrs
+
+    async def _fetch_cached_game(self, game_id: str) -> Any:
+        """Answers from fresh disk cache entries alone, returns ``_MISSING`` when a request is needed."""
+
+        if self.disk_cache is None:
+            return _MISSING
+
+        page = await self.disk_cache.get(self.game_url.format(game_id))
+        if page is None or not page.fresh:
+            return _MISSING
+
+        if page.value["title"] != "Fancade":
+            return page.value
+
+        probe = await self.disk_cache.get(self.image_url.format(game_id))
+        if probe is None or not probe.fresh:
+            return _MISSING
+
+        return page.value if GameStatus(probe.value) is GameStatus.exists else None
+
+    async def _fetch_game(self, game_id: str) -> Optional[dict[str, Any]]:
+        # fresh local answers cost no tokens and work while fancade is down
+        game_attrs = await self._fetch_cached_game(game_id)
+        if game_attrs is not _MISSING:
+            return game_attrs
+
+        if self.breaker.state == "open":
+            raise errors.FancadeUnavailableError("Fancade seems to be down at the moment, please try again in a few minutes.")
+
+        # one token per request, the page and the thumbnail probe, taken together so a rejection keeps neither
+        if not await self.limiter.acquire(self.max_wait, tokens=2):
+            raise errors.FancadeUnavailableError("I'm looking up too many games right now, please try again in a bit.")
+
+        if not self.breaker.allow():
+            raise errors.FancadeUnavailableError("Fancade seems to be down at the moment, please try again in a few minutes.")
+
+        try:
+            game_attrs, game_status = await gather_or_cancel(
+                get_game_attrs(self.session, self.game_url.format(game_id), self.disk_cache, self.negative_ttl),
+                game_exists_check(self.session, game_id, self.image_url, self.disk_cache, self.negative_ttl)
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.breaker.record_failure()
+            self.limiter.on_failure()
+            raise errors.FancadeUnavailableError() from e
+        except errors.FancadeUnavailableError:
+            self.breaker.record_failure()
+            self.limiter.on_failure()
+            raise
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+
+        if game_status is GameStatus.unknown:
+            self.breaker.record_failure()
+            self.limiter.on_failure()
+        else:
+            self.breaker.record_success()
+            self.limiter.on_success()
+
+        if game_attrs["title"] != "Fancade":
+            return game_attrs
+
+        # has no title, so the thumbnail decides whether the game exists
+        if game_status is GameStatus.unknown:
+            raise errors.FancadeUnavailableError()
+
+        return game_attrs if game_status is GameStatus.exists else None
@@ -0,0 +1,112 @@
+"""
+Versioned schema migrations.
+
+Migrations are numbered ``.sql`` files in the ``migrations`` directory,
+e.g. ``0004_add_something.sql``. Applied versions are recorded in the
+``schema_version`` table.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import re
+import logging
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import asyncpg
+
+
+__all__ = (
+    "MIGRATIONS_PATH",
+    "Migration",
+    "load_migrations",
+    "migrate",
+)
+
+MIGRATIONS_PATH = Path(__file__).resolve().parents[2] / "migrations"
+MIGRATION_FILE_REGEX = re.compile(r"^(?P<version>\d+)_(?P<name>\w+)\.sql$")
+
+# arbitrary key for pg_advisory_xact_lock, shared by every bot process
+MIGRATION_LOCK_ID = 7_106_211_417
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    query: str
+
+
+def load_migrations(path: Path = MIGRATIONS_PATH) -> list[Migration]:
+    migrations = []
+    for file in path.glob("*.sql"):
+        match = MIGRATION_FILE_REGEX.match(file.name)
+        if match is None:
+            continue
+
+        migrations.append(Migration(int(match["version"]), match["name"], file.read_text(encoding="utf8")))
+
+    migrations.sort()
+
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {path}.")
+
+    return migrations
+
+
+async def _current_version(connection: asyncpg.Connection) -> int:
+    try:
+        return await connection.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+    except asyncpg.UndefinedTableError:
+        return 0
+
+
+async def migrate(
+    pool: asyncpg.Pool,
+    path: Path = MIGRATIONS_PATH,
+    log: Optional[logging.Logger] = None
+) -> list[Migration]:
+    """Applies every pending migration and returns the ones that were applied.
+
+    When the database is up to date this is a single query. Otherwise all
+    pending migrations run in one transaction while holding an advisory
+    lock, so only one process migrates at a time.
+    """
+
+    migrations = load_migrations(path)
+    if not migrations:
+        return []
+
+    async with pool.acquire() as connection:
+        if await _current_version(connection) >= migrations[-1].version:
+            return []
+
+        async with connection.transaction():
+            await connection.execute("SELECT pg_advisory_xact_lock($1);", MIGRATION_LOCK_ID)
+            await connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+                """
+            )
+
+            # another process may have migrated while we waited for the lock
+            current_version = await _current_version(connection)
+            pending = [migration for migration in migrations if migration.version > current_version]
+
+            for migration in pending:
+                if log is not None:
+                    log.info(f"Applying migration {migration.version:04d}_{migration.name}.")
+
+                await connection.execute(migration.query)
+                await connection.execute(
+                    "INSERT INTO schema_version (version, name) VALUES ($1, $2);",
+                    migration.version,
+                    migration.name
+                )
+
+    return pending
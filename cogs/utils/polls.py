@@ -0,0 +1,218 @@
+"""
+In-memory metadata for open polls.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import time
+import heapq
+import random
+import asyncio
+import logging
+import datetime
+import itertools
+from collections import Counter
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterable, Iterator, Mapping, NamedTuple, Optional, TypeVar
+
+
+__all__ = (
+    "PollOption",
+    "PollInfo",
+    "group_polls",
+    "pick_winner",
+    "PollCache",
+    "DeadlineScheduler",
+)
+
+K = TypeVar("K", bound=Hashable)
+
+# long sleeps are cut short to re-check the wall clock
+MAX_SLEEP = 5 * 60
+
+
+class PollOption(NamedTuple):
+    id: int
+    emoji: str
+    text: str
+
+
+class PollInfo(NamedTuple):
+    id: int
+    message_id: int
+    channel_id: int
+    deadline: datetime.datetime
+    options: dict[str, PollOption]  # option text -> option
+    votes: dict[int, int]  # member ID -> option ID, kept up to date as members vote
+
+    @property
+    def view_options(self) -> dict[str, str]:
+        """The options as the emoji -> text mapping :class:`cogs.poll.PollView` takes."""
+
+        return {option.emoji: option.text for option in self.options.values()}
+
+    def vote(self, member_id: int, option_id: int) -> None:
+        self.votes[member_id] = option_id
+
+    def tally(self) -> list[tuple[PollOption, int]]:
+        """Returns every option with its vote count, in order."""
+
+        counts = Counter(self.votes.values())
+        return [(option, counts[option.id]) for option in self.options.values()]
+
+
+def group_polls(rows: Iterable[Mapping[str, Any]]) -> list[PollInfo]:
+    """Builds polls out of one row per option, in the shape :meth:`Database.fetch_polls` returns."""
+
+    polls: dict[int, PollInfo] = {}
+    for row in rows:
+        poll = polls.get(row["poll_id"])
+        if poll is None:
+            poll = polls[row["poll_id"]] = PollInfo(row["poll_id"], row["message_id"], row["channel_id"], row["deadline"], {}, {})
+
+        poll.options[row["option_text"]] = PollOption(row["option_id"], row["option_emoji"], row["option_text"])
+        for member_id in row["voter_ids"]:
+            poll.votes[member_id] = row["option_id"]
+
+    return list(polls.values())
+
+
+def pick_winner(results: list[Mapping[str, Any]]) -> Optional[int]:
+    """Returns the index of the option with the most votes, ties are broken randomly.
+
+    If nobody voted every option is tied, the winner is then picked randomly out of all of them.
+    """
+
+    if not results:
+        return None
+
+    most_votes = max(result["vote_count"] for result in results)
+    return random.choice([index for index, result in enumerate(results) if result["vote_count"] == most_votes])
+
+
+class PollCache:
+    """Open polls by message ID.
+
+    Polls are added when they are created or loaded at startup and removed
+    when they end. They never change in between, so votes can be resolved
+    without touching the database. A miss falls back to ``load``.
+    """
+
+    __slots__ = "load", "_polls"
+
+    def __init__(self, load: Callable[[int], Awaitable[Iterable[Mapping[str, Any]]]]) -> None:
+        self.load = load
+        self._polls: dict[int, PollInfo] = {}
+
+    def __len__(self) -> int:
+        return len(self._polls)
+
+    def __iter__(self) -> Iterator[PollInfo]:
+        return iter(list(self._polls.values()))
+
+    def peek(self, message_id: int) -> Optional[PollInfo]:
+        return self._polls.get(message_id)
+
+    def add(self, poll: PollInfo) -> None:
+        self._polls[poll.message_id] = poll
+
+    def pop(self, message_id: int) -> Optional[PollInfo]:
+        return self._polls.pop(message_id, None)
+
+    async def get(self, message_id: int) -> Optional[PollInfo]:
+        poll = self._polls.get(message_id)
+        if poll is None:
+            polls = group_polls(await self.load(message_id))
+            if not polls:
+                return None
+
+            poll = polls[0]
+            self.add(poll)
+
+        return poll
+
+
+class DeadlineScheduler(Generic[K]):
+    """Calls ``callback`` with every key whose deadline has passed.
+
+    Deadlines are kept in a min-heap and a single task sleeps until the
+    earliest one, keys that are due together are handed over in one batch.
+    Rescheduling or cancelling a key leaves its old heap entry behind, it
+    is skipped when it reaches the top.
+    """
+
+    __slots__ = "callback", "log", "_heap", "_deadlines", "_counter", "_wakeup", "_task"
+
+    def __init__(self, callback: Callable[[list[K]], Awaitable[Any]], log: Optional[logging.Logger] = None) -> None:
+        self.callback = callback
+        self.log = log
+        self._heap: list[tuple[float, int, K]] = []
+        self._deadlines: dict[K, float] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._deadlines
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def schedule(self, key: K, deadline: datetime.datetime) -> None:
+        when = deadline.timestamp()
+        self._deadlines[key] = when
+        # the counter keeps keys from being compared when deadlines tie
+        heapq.heappush(self._heap, (when, next(self._counter), key))
+        if self._heap[0][2] == key:
+            self._wakeup.set()
+
+    def cancel(self, key: K) -> None:
+        self._deadlines.pop(key, None)
+
+    def _peek(self) -> Optional[float]:
+        while self._heap:
+            when, _, key = self._heap[0]
+            if self._deadlines.get(key) == when:
+                return when
+
+            heapq.heappop(self._heap)
+
+        return None
+
+    def _pop_due(self, now: float) -> list[K]:
+        due = []
+        while (when := self._peek()) is not None and when <= now:
+            _, _, key = heapq.heappop(self._heap)
+            del self._deadlines[key]
+            due.append(key)
+
+        return due
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            when = self._peek()
+            delay = MAX_SLEEP if when is None else min(when - time.time(), MAX_SLEEP)
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+                continue
+
+            due = self._pop_due(time.time())
+            try:
+                await self.callback(due)
+            except Exception:
+                if self.log is not None:
+                    self.log.exception(f"Handling {len(due)} due deadlines failed.")
@@ -0,0 +1,128 @@
+"""
+Client side rate limiting for outbound requests.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import asyncio
+import math
+import time
+from typing import Callable, Optional
+
+
+__all__ = (
+    "TokenBucket",
+    "CircuitBreaker",
+)
+
+
+class TokenBucket:
+    """A token bucket whose refill rate adapts to how the remote side is doing.
+
+    Every failure halves the rate (down to ``min_rate``) and every success
+    slowly brings it back up to ``max_rate``.
+    """
+
+    __slots__ = "rate", "min_rate", "max_rate", "capacity", "tokens", "_updated", "_clock"
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        *,
+        min_rate: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.max_rate = rate
+        self.min_rate = rate / 10 if min_rate is None else min_rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, max_wait: float = math.inf, tokens: float = 1) -> bool:
+        """Takes ``tokens`` tokens at once, waiting for them if needed.
+
+        Returns False without taking any if it would have to wait longer than ``max_wait``.
+        """
+
+        self._refill()
+        wait = (tokens - self.tokens) / self.rate if self.tokens < tokens else 0.0
+        if wait > max_wait:
+            return False
+
+        # reserve the tokens now so callers arriving while we sleep queue up behind us
+        self.tokens -= tokens
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        return True
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def on_failure(self) -> None:
+        self.rate = max(self.min_rate, self.rate / 2)
+
+
+class CircuitBreaker:
+    """Stops calling a remote service after too many consecutive failures.
+
+    Once open, calls are refused until ``reset_timeout`` has passed, then a
+    single trial call is let through. Its outcome closes or re-opens the breaker.
+    """
+
+    __slots__ = "failure_threshold", "reset_timeout", "failures", "opened_at", "_trial", "_clock"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        *,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._clock = clock
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+
+        if state == "half-open" and not self._trial:
+            self._trial = True
+            return True
+
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = self._clock()
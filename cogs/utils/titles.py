@@ -0,0 +1,181 @@
+"""
+In-memory index of submitted game titles, used for autocomplete.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import heapq
+from typing import Any, Awaitable, Callable, Iterable, NamedTuple, Optional, Mapping
+
+from cogs.utils.aio import SingleFlight
+
+
+__all__ = (
+    "MAX_CHOICES",
+    "TitleEntry",
+    "GuildTitleIndex",
+    "TitleIndex",
+)
+
+# discord never shows more autocomplete choices than this
+MAX_CHOICES = 25
+
+GRAM_SIZE = 3
+
+
+class TitleEntry(NamedTuple):
+    game_url: str
+    author_id: int
+    game_title: str
+    folded: str
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class GuildTitleIndex:
+    """Trigram index over one guild's submission titles.
+
+    Searching is a case-insensitive substring match. Queries of three or more
+    characters only look at titles sharing every trigram with the query,
+    shorter ones scan the guild (or the author's) titles.
+    """
+
+    __slots__ = "_entries", "_grams", "_authors"
+
+    def __init__(self, rows: Iterable[Mapping[str, Any]] = ()) -> None:
+        self._entries: dict[str, TitleEntry] = {}
+        self._grams: dict[str, set[str]] = {}
+        self._authors: dict[int, set[str]] = {}
+
+        for row in rows:
+            self.add(row["game_url"], row["author_id"], row["game_title"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, game_url: str, author_id: int, game_title: str) -> None:
+        self.discard(game_url)
+
+        entry = TitleEntry(game_url, author_id, game_title, game_title.casefold())
+        self._entries[game_url] = entry
+        self._authors.setdefault(author_id, set()).add(game_url)
+        for gram in _grams(entry.folded):
+            self._grams.setdefault(gram, set()).add(game_url)
+
+    def discard(self, game_url: str) -> None:
+        entry = self._entries.pop(game_url, None)
+        if entry is None:
+            return None
+
+        self._remove_from(self._authors, entry.author_id, game_url)
+        for gram in _grams(entry.folded):
+            self._remove_from(self._grams, gram, game_url)
+
+    def discard_author(self, author_id: int) -> None:
+        for game_url in list(self._authors.get(author_id, ())):
+            self.discard(game_url)
+
+    def retitle(self, game_url: str, game_title: str) -> None:
+        entry = self._entries.get(game_url)
+        if entry is not None and entry.game_title != game_title:
+            self.add(game_url, entry.author_id, game_title)
+
+    def search(self, query: str, author_id: Optional[int] = None, limit: int = MAX_CHOICES) -> list[TitleEntry]:
+        """Returns up to ``limit`` titles containing ``query``, ordered by author and title."""
+
+        query = query.casefold()
+        candidates: Iterable[str]
+
+        grams = _grams(query)
+        if grams:
+            postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+            candidates = set.intersection(*postings)
+            if author_id is not None:
+                candidates &= self._authors.get(author_id, set())
+
+        elif author_id is not None:
+            candidates = self._authors.get(author_id, ())
+
+        else:
+            candidates = self._entries
+
+        matches = (
+            entry for entry in map(self._entries.__getitem__, candidates)
+            if query in entry.folded
+        )
+        return heapq.nsmallest(limit, matches, key=lambda entry: (entry.author_id, entry.folded))
+
+    @staticmethod
+    def _remove_from(index: dict[Any, set[str]], key: Any, game_url: str) -> None:
+        urls = index.get(key)
+        if urls is not None:
+            urls.discard(game_url)
+            if not urls:
+                del index[key]
+
+
+class TitleIndex:
+    """Lazily loaded :class:`GuildTitleIndex` per guild.
+
+    A guild's titles are loaded on first use, after that the index is kept
+    up to date by the commands that change submissions. Changes made while
+    a guild is still loading discard that load so it can't go stale.
+    """
+
+    __slots__ = "load", "_guilds", "_versions", "_epoch", "_loading"
+
+    def __init__(self, load: Callable[[int], Awaitable[Iterable[Mapping[str, Any]]]]) -> None:
+        self.load = load
+        self._guilds: dict[int, GuildTitleIndex] = {}
+        self._versions: dict[int, int] = {}
+        self._epoch = 0  # bumped by changes that can touch any guild
+        self._loading: SingleFlight[int, GuildTitleIndex] = SingleFlight()
+
+    def peek(self, guild_id: int) -> Optional[GuildTitleIndex]:
+        return self._guilds.get(guild_id)
+
+    async def get(self, guild_id: int) -> GuildTitleIndex:
+        index = self._guilds.get(guild_id)
+        if index is None:
+            index = await self._loading.do(guild_id, lambda: self._load(guild_id))
+
+        return index
+
+    async def _load(self, guild_id: int) -> GuildTitleIndex:
+        version = self._epoch, self._versions.get(guild_id, 0)
+        index = GuildTitleIndex(await self.load(guild_id))
+        if (self._epoch, self._versions.get(guild_id, 0)) == version:
+            self._guilds[guild_id] = index
+
+        return index
+
+    def _changed(self, guild_id: int) -> Optional[GuildTitleIndex]:
+        self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+        return self._guilds.get(guild_id)
+
+    def add(self, guild_id: int, game_url: str, author_id: int, game_title: str) -> None:
+        if (index := self._changed(guild_id)) is not None:
+            index.add(game_url, author_id, game_title)
+
+    def discard(self, guild_id: int, game_url: str) -> None:
+        if (index := self._changed(guild_id)) is not None:
+            index.discard(game_url)
+
+    def clear(self, guild_id: int, author_id: Optional[int] = None) -> None:
+        if (index := self._changed(guild_id)) is None:
+            return None
+
+        if author_id is None:
+            self._guilds[guild_id] = GuildTitleIndex()
+        else:
+            index.discard_author(author_id)
+
+    def retitle(self, game_url: str, game_title: str) -> None:
+        """Renames the game in every guild it was submitted to."""
+
+        self._epoch += 1
+        for index in self._guilds.values():
+            index.retitle(game_url, game_title)
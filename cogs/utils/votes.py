@@ -0,0 +1,88 @@
+"""
+Write-behind buffering for poll votes.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from cogs.utils.database import Database
+
+
+__all__ = (
+    "VoteBuffer",
+)
+
+
+class VoteBuffer:
+    """Holds poll votes in memory and writes them to the database in batches.
+
+    Only a member's latest vote in a poll is kept. The buffer is flushed
+    ``interval`` seconds after the first vote of a batch arrives, call
+    :meth:`flush` to write everything right away, e.g. before tallying.
+    A batch that fails to write is put back so the next flush retries it.
+    """
+
+    __slots__ = "db", "interval", "log", "_votes", "_pending", "_lock", "_task"
+
+    def __init__(self, db: "Database", interval: float = 0.25, log: Optional[logging.Logger] = None) -> None:
+        self.db = db
+        self.interval = interval
+        self.log = log
+        self._votes: dict[tuple[int, int], int] = {}  # (member_id, poll_id) -> option_id
+        self._pending = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def __len__(self) -> int:
+        return len(self._votes)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def add(self, member_id: int, poll_id: int, option_id: int) -> None:
+        self._votes[member_id, poll_id] = option_id
+        self._pending.set()
+
+    async def flush(self) -> int:
+        """Writes every buffered vote and returns how many were written."""
+
+        async with self._lock:
+            votes, self._votes = self._votes, {}
+            self._pending.clear()
+            if not votes:
+                return 0
+
+            try:
+                await self.db.record_votes([(*key, option_id) for key, option_id in votes.items()])
+            except BaseException:
+                # anything voted since takes precedence over the failed batch
+                self._votes = votes | self._votes
+                self._pending.set()
+                raise
+
+            return len(votes)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await self._pending.wait()
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                if self.log is not None:
+                    self.log.exception(f"Writing {len(self._votes)} buffered votes failed, retrying.")
+
+                await asyncio.sleep(self.interval)
@@ -0,0 +1,31 @@
+-- tables created by the original bootstrap script, kept idempotent so
+-- databases created before migrations existed can adopt this history
+CREATE TABLE IF NOT EXISTS submission (
+    id SERIAL PRIMARY KEY,
+    author_id BIGINT,
+    guild_id BIGINT,
+    game_title TEXT,
+    game_url TEXT
+);
+
+CREATE TABLE IF NOT EXISTS poll (
+    id SERIAL PRIMARY KEY,
+    message_id BIGINT,
+    channel_id BIGINT,
+    deadline INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS poll_options (
+    id SERIAL PRIMARY KEY,
+    poll_id INTEGER REFERENCES poll(id) ON DELETE CASCADE,
+    option_emoji VARCHAR(100) NOT NULL,
+    option_text VARCHAR(100) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS poll_votes (
+    id SERIAL PRIMARY KEY,
+    member_id BIGINT,
+    poll_id INTEGER REFERENCES poll(id) ON DELETE CASCADE,
+    option_id INTEGER REFERENCES poll_options(id) ON DELETE CASCADE,
+    UNIQUE (member_id, poll_id)
+);
@@ -0,0 +1,7 @@
+-- scraped game metadata, kept fresh by the submission refresher
+ALTER TABLE submission
+    ADD COLUMN IF NOT EXISTS image_url TEXT,
+    ADD COLUMN IF NOT EXISTS game_description TEXT,
+    ADD COLUMN IF NOT EXISTS game_author TEXT,
+    ADD COLUMN IF NOT EXISTS checked_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    ADD COLUMN IF NOT EXISTS deleted BOOLEAN NOT NULL DEFAULT FALSE;
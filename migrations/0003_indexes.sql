@@ -0,0 +1,16 @@
+-- a game can only be submitted once per guild
+DELETE FROM submission a USING submission b
+WHERE a.guild_id = b.guild_id AND a.game_url = b.game_url AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS submission_guild_id_game_url_key ON submission (guild_id, game_url);
+CREATE INDEX IF NOT EXISTS submission_guild_id_author_id_idx ON submission (guild_id, author_id);
+CREATE INDEX IF NOT EXISTS submission_game_url_idx ON submission (game_url);
+CREATE INDEX IF NOT EXISTS submission_checked_at_idx ON submission (checked_at) WHERE NOT deleted;
+
+CREATE UNIQUE INDEX IF NOT EXISTS poll_message_id_key ON poll (message_id);
+CREATE INDEX IF NOT EXISTS poll_deadline_idx ON poll (deadline);
+
+CREATE INDEX IF NOT EXISTS poll_options_poll_id_option_text_idx ON poll_options (poll_id, option_text);
+
+CREATE INDEX IF NOT EXISTS poll_votes_option_id_idx ON poll_votes (option_id);
+CREATE INDEX IF NOT EXISTS poll_votes_poll_id_idx ON poll_votes (poll_id);
@@ -0,0 +1,3 @@
+-- lets /submissions show walk a guild's (or a member's) submissions page by page
+CREATE INDEX IF NOT EXISTS submission_guild_id_author_id_id_idx ON submission (guild_id, author_id, id);
+DROP INDEX IF EXISTS submission_guild_id_author_id_idx;
@@ -0,0 +1,4 @@
+-- fuzzy title search for /submissions search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS submission_game_title_trgm_idx ON submission USING gin (game_title gin_trgm_ops);
@@ -0,0 +1,12 @@
+-- poll deadlines used to be 32-bit epoch seconds
+DO $$
+BEGIN
+    IF (
+        SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'poll' AND column_name = 'deadline'
+    ) = 'integer' THEN
+        ALTER TABLE poll ALTER COLUMN deadline TYPE timestamptz USING to_timestamp(deadline);
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS poll_deadline_idx ON poll (deadline);
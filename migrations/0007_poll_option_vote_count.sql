@@ -0,0 +1,27 @@
+-- per-option vote counters, so tallying a poll reads one row per option
+ALTER TABLE poll_options ADD COLUMN IF NOT EXISTS vote_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE poll_options SET vote_count = counts.vote_count
+FROM (SELECT option_id, COUNT(*) AS vote_count FROM poll_votes GROUP BY option_id) counts
+WHERE poll_options.id = counts.option_id;
+
+-- votes are only ever deleted together with their poll, so deletes don't need to be counted
+CREATE OR REPLACE FUNCTION poll_votes_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF OLD.option_id IS NOT DISTINCT FROM NEW.option_id THEN
+            RETURN NULL;
+        END IF;
+
+        UPDATE poll_options SET vote_count = vote_count - 1 WHERE id = OLD.option_id;
+    END IF;
+
+    UPDATE poll_options SET vote_count = vote_count + 1 WHERE id = NEW.option_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS poll_votes_count ON poll_votes;
+CREATE TRIGGER poll_votes_count
+AFTER INSERT OR UPDATE OF option_id ON poll_votes
+FOR EACH ROW EXECUTE FUNCTION poll_votes_count();
@@ -0,0 +1,22 @@
+-- ended polls are kept as one compact row, their votes are purged in the background.
+-- that breaks the note on the 0007 trigger, votes are no longer only deleted together
+-- with their poll. Purged votes aren't subtracted from vote_count, which is fine since
+-- the counts were archived when the poll ended and nothing reads them afterwards.
+CREATE TABLE IF NOT EXISTS poll_archive (
+    poll_id INTEGER PRIMARY KEY,
+    message_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    guild_id BIGINT,
+    deadline TIMESTAMPTZ NOT NULL,
+    ended_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    ended_early BOOLEAN NOT NULL DEFAULT FALSE,
+    option_emojis TEXT[] NOT NULL,
+    option_texts TEXT[] NOT NULL,
+    vote_counts INTEGER[] NOT NULL,
+    winner SMALLINT NOT NULL  -- 1-based index into the option arrays
+);
+
+CREATE INDEX IF NOT EXISTS poll_archive_guild_id_ended_at_idx ON poll_archive (guild_id, ended_at DESC);
+
+ALTER TABLE poll ADD COLUMN IF NOT EXISTS ended_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS poll_ended_at_idx ON poll (ended_at) WHERE ended_at IS NOT NULL;
@@ -0,0 +1,2 @@
+-- open polls are loaded at startup, ended ones make up most of the table until they are purged
+CREATE INDEX IF NOT EXISTS poll_open_idx ON poll (id) WHERE ended_at IS NULL;
@@ -0,0 +1,4 @@
+-- ending a poll and announcing it are separate steps, announced_at is claimed by whoever announces it
+ALTER TABLE poll ADD COLUMN IF NOT EXISTS announced_at TIMESTAMPTZ;
+
+UPDATE poll SET announced_at = ended_at WHERE ended_at IS NOT NULL AND announced_at IS NULL;
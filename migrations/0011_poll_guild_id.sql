@@ -0,0 +1,2 @@
+-- stored when the poll is created, so archiving it doesn't depend on the channel still being cached
+ALTER TABLE poll ADD COLUMN IF NOT EXISTS guild_id BIGINT;
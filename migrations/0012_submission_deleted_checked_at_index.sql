@@ -0,0 +1,2 @@
+-- games marked as deleted are re-checked by the refresher as well
+CREATE INDEX IF NOT EXISTS submission_deleted_checked_at_idx ON submission (checked_at) WHERE deleted;
@@ -0,0 +1,2 @@
+-- polls left unannounced by a stopped process are looked up at startup, among every ended poll awaiting its purge
+CREATE INDEX IF NOT EXISTS poll_unannounced_idx ON poll (id) WHERE ended_at IS NOT NULL AND announced_at IS NULL;
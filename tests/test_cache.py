@@ -0,0 +1,35 @@
+"""
+Tests for the on-disk HTTP cache.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import time
+import asyncio
+from pathlib import Path
+
+from cogs.utils.cache import DiskCache
+
+
+class EagerDiskCache(DiskCache):
+    __slots__ = ()
+
+    EVICT_EVERY = 5
+
+
+def test_reads_keep_entries_from_being_evicted(tmp_path: Path) -> None:
+    async def run() -> list[str]:
+        cache = EagerDiskCache(tmp_path / "http_cache.sqlite3", max_entries=3)
+        try:
+            for i in range(4):
+                await cache.set(f"key{i}", i, expires_at=time.time() + 60)
+                await asyncio.sleep(0.01)
+
+            await cache.get("key0")
+            await cache.set("key4", 4, expires_at=time.time() + 60)  # evicts down to 3 entries
+            return [key for key in ("key0", "key1", "key2", "key3", "key4") if await cache.get(key) is not None]
+        finally:
+            cache.close()
+
+    assert asyncio.run(run()) == ["key0", "key3", "key4"]
@@ -0,0 +1,217 @@
+"""
+Tests for the Fancade client against a local stub server.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import time
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from cogs import errors
+from cogs.utils.cache import DiskCache
+from cogs.utils.fancade import FancadeClient, JPEG_MAGIC
+
+
+GAME_PAGE = """<html><head><title>Marble Run</title>
+<meta property="og:image" content="https://www.fancade.com/images/A1B2C3.jpg">
+<meta name="description" content="Roll the marble.">
+</head><body><p class="author">Isaglish</p></body></html>"""
+
+
+class StubFancade:
+    """Serves game pages and thumbnails with a configurable status and latency."""
+
+    def __init__(self) -> None:
+        self.status = 200
+        self.latency = 0.0
+        self.page = GAME_PAGE
+        self.image_missing = False
+        self.requests = 0
+        self.url = ""
+
+    async def _respond(self, ok: Callable[[], web.Response]) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return ok() if self.status == 200 else web.Response(status=self.status, text="Slow down")
+
+    async def page_handler(self, request: web.Request) -> web.Response:
+        return await self._respond(lambda: web.Response(text=self.page, content_type="text/html"))
+
+    async def image_handler(self, request: web.Request) -> web.Response:
+        if self.image_missing:
+            return await self._respond(lambda: web.Response(status=404))
+
+        return await self._respond(lambda: web.Response(status=206, body=JPEG_MAGIC.ljust(16, b"\0"), content_type="image/jpeg"))
+
+    async def __aenter__(self) -> "StubFancade":
+        app = web.Application()
+        app.router.add_get("/images/{game_id}.jpg", self.image_handler)
+        app.router.add_get("/{game_id}", self.page_handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", 0).start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self._runner.cleanup()
+
+
+def with_client(**options: Any) -> Callable[[Callable[..., Awaitable[None]]], Callable[[], None]]:
+    """Runs the test with a stub server and a :class:`FancadeClient` pointed at it."""
+
+    timeout = aiohttp.ClientTimeout(total=options.pop("timeout", 5))
+    use_disk_cache = options.pop("disk_cache", False)
+
+    def decorator(test: Callable[..., Awaitable[None]]) -> Callable[[], None]:
+        async def run() -> None:
+            with tempfile.TemporaryDirectory() as directory:
+                disk_cache = DiskCache(Path(directory) / "http_cache.sqlite3") if use_disk_cache else None
+                try:
+                    async with StubFancade() as stub, aiohttp.ClientSession(timeout=timeout) as session:
+                        client = FancadeClient(
+                            session,
+                            game_url=stub.url + "/{}",
+                            image_url=stub.url + "/images/{}.jpg",
+                            disk_cache=disk_cache,
+                            **options
+                        )
+                        await test(stub, client)
+                finally:
+                    if disk_cache is not None:
+                        disk_cache.close()
+
+        def wrapper() -> None:
+            asyncio.run(run())
+
+        # not functools.wraps, pytest would follow __wrapped__ and ask for fixtures
+        wrapper.__name__ = test.__name__
+        return wrapper
+
+    return decorator
+
+
+@with_client()
+async def test_fetches_game(stub: StubFancade, client: FancadeClient) -> None:
+    game_attrs = await client.get_game("A1B2C3")
+
+    assert game_attrs == {
+        "title": "Marble Run",
+        "image_url": "https://www.fancade.com/images/A1B2C3.jpg",
+        "description": "Roll the marble.",
+        "author": "Isaglish"
+    }
+    assert client.breaker.state == "closed"
+
+
+@with_client()
+async def test_error_status_is_a_failure(stub: StubFancade, client: FancadeClient) -> None:
+    stub.status = 429
+
+    with pytest.raises(errors.FancadeUnavailableError):
+        await client.get_game("A1B2C3")
+
+    assert client.breaker.failures == 1
+    assert client.limiter.rate < client.limiter.max_rate
+
+
+@with_client()
+async def test_page_without_metadata_is_a_failure(stub: StubFancade, client: FancadeClient) -> None:
+    stub.page = "<html><head><title>Blocked</title></head></html>"
+
+    with pytest.raises(errors.FancadeUnavailableError):
+        await client.get_game("A1B2C3")
+
+    assert client.breaker.failures == 1
+
+
+@with_client(failure_threshold=2, reset_timeout=0.2)
+async def test_breaker_opens_half_opens_and_closes(stub: StubFancade, client: FancadeClient) -> None:
+    stub.status = 503
+    for _ in range(2):
+        with pytest.raises(errors.FancadeUnavailableError):
+            await client.get_game("A1B2C3")
+
+    assert client.breaker.state == "open"
+
+    # open, requests fail fast without reaching the server
+    requests = stub.requests
+    with pytest.raises(errors.FancadeUnavailableError):
+        await client.get_game("A1B2C3")
+
+    assert stub.requests == requests
+
+    # a failed trial re-opens the breaker
+    await asyncio.sleep(0.25)
+    assert client.breaker.state == "half-open"
+    with pytest.raises(errors.FancadeUnavailableError):
+        await client.get_game("A1B2C3")
+
+    assert client.breaker.state == "open"
+
+    # a successful one closes it
+    await asyncio.sleep(0.25)
+    stub.status = 200
+    assert await client.get_game("A1B2C3") is not None
+    assert client.breaker.state == "closed"
+
+
+@with_client(rate=1, burst=3, max_wait=0.1)
+async def test_limiter_rejects_past_max_wait(stub: StubFancade, client: FancadeClient) -> None:
+    await client.get_game("A1B2C3")
+    requests = stub.requests
+
+    # one token is left, a lookup needs two
+    with pytest.raises(errors.FancadeUnavailableError, match="too many games"):
+        await client.get_game("D4E5F6")
+
+    assert stub.requests == requests
+    assert client.breaker.failures == 0
+    assert client.limiter.tokens >= 1  # the rejected lookup kept nothing
+
+
+@with_client(timeout=0.1)
+async def test_timeout_is_a_failure(stub: StubFancade, client: FancadeClient) -> None:
+    stub.latency = 1
+
+    with pytest.raises(errors.FancadeUnavailableError):
+        await client.get_game("A1B2C3")
+
+    assert client.breaker.failures == 1
+
+
+
+@with_client(disk_cache=True)
+async def test_fresh_disk_entries_skip_the_limiter_and_breaker(stub: StubFancade, client: FancadeClient) -> None:
+    await client.get_game("A1B2C3")
+
+    stub.status = 503
+    for _ in range(client.breaker.failure_threshold):
+        client.breaker.record_failure()
+
+    client.limiter.tokens = 0
+    requests = stub.requests
+    assert await client.get_game("A1B2C3", refresh=True) is not None
+    assert stub.requests == requests
+
+
+@with_client(disk_cache=True, negative_ttl=60)
+async def test_missing_games_stay_fresh_for_negative_ttl(stub: StubFancade, client: FancadeClient) -> None:
+    stub.page = GAME_PAGE.replace("Marble Run", "Fancade")
+    stub.image_missing = True
+
+    assert await client.get_game("A1B2C3") is None
+
+    assert client.disk_cache is not None
+    for url in (client.game_url, client.image_url):
+        entry = await client.disk_cache.get(url.format("A1B2C3"))
+        assert entry is not None and entry.expires_at <= time.time() + 60
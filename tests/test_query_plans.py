@@ -0,0 +1,198 @@
+"""
+Checks that every query in the data access layer is served by an index.
+
+Needs a PostgreSQL database, set ``ODDBOT_TEST_DSN`` to run it. Everything
+is created in a throwaway schema that is dropped afterwards. The queries
+are planned with the default planner settings against a seeded dataset
+large enough that a missing index shows up as a sequential scan.
+
+:copyright: (c) 2022 Isaglish
+:license: MIT, see LICENSE for more details.
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import datetime
+from typing import Any, Iterator
+
+import asyncpg
+import pytest
+
+from cogs.utils import database
+from cogs.utils.migrations import migrate
+
+
+DSN = os.environ.get("ODDBOT_TEST_DSN")
+
+GAME_URL = "https://play.fancade.com/A6D3B8E2F1C04D79"
+
+# catalog scans (e.g. DATABASE_INFO reading pg_stat_activity) don't matter
+TABLES = {"submission", "poll", "poll_options", "poll_votes", "poll_archive"}
+
+# poll IDs in the seed data
+OPEN_POLL = 39950
+UNANNOUNCED_POLL = 39895
+
+SEED = """
+-- 200 guilds with 1000 submissions each. The refresher keeps almost every game checked within
+-- the last day, a few are overdue and a few were marked as deleted.
+INSERT INTO submission (author_id, guild_id, game_title, game_url, image_url, checked_at, deleted)
+SELECT i % 5000, i % 200, 'Game ' || md5(i::text), 'https://play.fancade.com/' || upper(substr(md5(i::text), 1, 16)),
+    'https://www.fancade.com/images/' || upper(substr(md5(i::text), 1, 16)) || '.jpg',
+    CASE
+        WHEN i % 500 = 1 THEN now() - (i % 14) * interval '1 day'
+        WHEN i % 100 = 0 THEN now() - interval '2 days'
+        ELSE now() - (i % 1440) * interval '1 minute'
+    END,
+    i % 500 = 1
+FROM generate_series(1, 200000) AS i;
+
+-- a purge backlog: 100 polls are open, the rest ended an hour apart. The oldest ones
+-- already had their votes purged, a few were never announced.
+INSERT INTO poll (message_id, channel_id, guild_id, deadline, ended_at, announced_at)
+SELECT 1000000 + i, i % 50, i % 200, now() + (i - 39900) * interval '1 hour',
+    CASE WHEN i <= 39900 THEN now() - (39900 - i) * interval '1 hour' END,
+    CASE WHEN i <= 39890 THEN now() - (39900 - i) * interval '1 hour' END
+FROM generate_series(1, 40000) AS i;
+
+INSERT INTO poll_options (poll_id, option_emoji, option_text)
+SELECT poll.id, n::text, 'Option ' || n
+FROM poll, generate_series(1, 4) AS n;
+
+INSERT INTO poll_votes (member_id, poll_id, option_id)
+SELECT member, poll.id, poll_options.id
+FROM poll
+CROSS JOIN generate_series(1, CASE WHEN poll.ended_at IS NULL THEN 200 ELSE 10 END) AS member
+JOIN poll_options ON poll_options.poll_id = poll.id AND poll_options.option_emoji = (member % 4 + 1)::text
+WHERE poll.message_id > 1030000;
+
+INSERT INTO poll_archive (poll_id, message_id, channel_id, guild_id, deadline, ended_at, option_emojis, option_texts, vote_counts, winner)
+SELECT poll.id, poll.message_id, poll.channel_id, poll.guild_id, poll.deadline, poll.ended_at, '{1,2}', '{a,b}', '{3,4}', 2
+FROM poll
+WHERE poll.ended_at IS NOT NULL;
+"""
+
+# arguments for every query, new queries have to be added here
+QUERY_ARGS: dict[str, tuple[Any, ...]] = {
+    "FIND_SUBMISSION": (1, GAME_URL),
+    "FIND_SUBMITTED_URLS": (1, [GAME_URL]),
+    "INSERT_SUBMISSION": (1, 1, "Marble Run", GAME_URL, "image", "description", "author"),
+    "INSERT_SUBMISSIONS": (1, 1, ["Marble Run"], [GAME_URL], ["image"], ["description"], ["author"]),
+    "DELETE_SUBMISSION": (1, GAME_URL),
+    "FETCH_GUILD_TITLES": (1,),
+    "SEARCH_GUILD_SUBMISSIONS": (1, "marble", "%marble%", 10),
+    "SEARCH_AUTHOR_SUBMISSIONS": (1, "marble", "%marble%", 10, 1),
+    "COUNT_GUILD_SUBMISSIONS": (1,),
+    "COUNT_AUTHOR_SUBMISSIONS": (1, 1),
+    "FETCH_GUILD_SUBMISSIONS_PAGE": (1, *database.FIRST_PAGE_KEY, 10),
+    "FETCH_AUTHOR_SUBMISSIONS_PAGE": (1, 1, -1, 10),
+    "DELETE_GUILD_SUBMISSIONS": (1, 500),
+    "DELETE_AUTHOR_SUBMISSIONS": (1, 500, 1),
+    "FETCH_STALE_GAME_URLS": (datetime.timedelta(days=1), 20, datetime.timedelta(days=7)),
+    "UPDATE_GAME_METADATA": (GAME_URL, "Marble Run", "image", "description", "author"),
+    "MARK_GAME_DELETED": (GAME_URL,),
+    "FETCH_POLLS": (),
+    "FETCH_POLL": (1000000 + OPEN_POLL,),
+    "INSERT_POLL": (1, 1, 1, datetime.datetime.now(datetime.timezone.utc), ["1"], ["Option 1"]),
+    "CLAIM_POLL": (1000000 + OPEN_POLL,),
+    "ARCHIVE_POLL": (OPEN_POLL, 1, False, 1),
+    "END_POLL": (OPEN_POLL,),
+    "CLAIM_POLL_ANNOUNCEMENT": (UNANNOUNCED_POLL,),
+    "RELEASE_POLL_ANNOUNCEMENT": (UNANNOUNCED_POLL,),
+    "FETCH_UNANNOUNCED_POLLS": (),
+    "FETCH_POLL_ENDED": (1000000 + OPEN_POLL,),
+    "PURGE_ENDED_POLL_VOTES": (1000,),
+    "DELETE_PURGED_POLLS": (1000,),
+    "FETCH_POLL_HISTORY": (1, 10),
+    "RECORD_VOTES": ([1], [OPEN_POLL], [OPEN_POLL * 4]),
+    "FETCH_POLL_RESULTS": (1000000 + OPEN_POLL,),
+    "DATABASE_INFO": (),
+}
+
+QUERIES = {name: value for name, value in vars(database).items() if name.isupper() and isinstance(value, str)}
+
+PARTIAL_INDEXES = """
+SELECT index.relname FROM pg_index
+JOIN pg_class AS index ON index.oid = pg_index.indexrelid
+JOIN pg_namespace ON pg_namespace.oid = index.relnamespace
+WHERE pg_index.indpred IS NOT NULL AND pg_namespace.nspname = current_schema();
+"""
+
+
+async def explain_queries() -> tuple[dict[str, dict[str, Any]], set[str]]:
+    assert DSN is not None
+    schema = f"oddbot_test_{uuid.uuid4().hex[:8]}"
+
+    connection = await asyncpg.connect(DSN)
+    await connection.execute(f"CREATE SCHEMA {schema};")
+    try:
+        pool = await asyncpg.create_pool(DSN, min_size=1, max_size=1, server_settings={"search_path": f"{schema}, public"})
+        assert pool
+        try:
+            await migrate(pool)
+            async with pool.acquire() as conn:
+                await conn.execute(SEED)
+                # also sets the visibility map, so index only scans are costed like in production
+                await conn.execute(f"VACUUM ANALYZE {', '.join(TABLES)};")
+
+                plans = {}
+                for name, args in QUERY_ARGS.items():
+                    result = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {QUERIES[name]}", *args)
+                    plans[name] = json.loads(result)[0]["Plan"]
+
+                partial_indexes = {row["relname"] for row in await conn.fetch(PARTIAL_INDEXES)}
+                return plans, partial_indexes
+        finally:
+            await pool.close()
+    finally:
+        await connection.execute(f"DROP SCHEMA {schema} CASCADE;")
+        await connection.close()
+
+
+def walk(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from walk(child)
+
+
+def full_scans(plan: dict[str, Any], partial_indexes: set[str]) -> list[str]:
+    """Returns the plan nodes that read a whole bot table or index."""
+
+    scans = []
+    for node in walk(plan):
+        if node.get("Relation Name") not in TABLES and node["Node Type"] != "Bitmap Index Scan":
+            continue
+
+        if node["Node Type"] == "Seq Scan":
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+
+        # an index read end to end is a sequential scan in disguise, unless the index only covers the wanted rows
+        elif (
+            node["Node Type"] in ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+            and "Index Cond" not in node
+            and node["Index Name"] not in partial_indexes
+        ):
+            scans.append(f"{node['Node Type']} on {node['Index Name']} without an Index Cond")
+
+    return scans
+
+
+@pytest.fixture(scope="module")
+def plans() -> tuple[dict[str, dict[str, Any]], set[str]]:
+    if DSN is None:
+        pytest.skip("ODDBOT_TEST_DSN is not set")
+
+    return asyncio.run(explain_queries())
+
+
+def test_every_query_is_covered() -> None:
+    assert QUERIES.keys() == QUERY_ARGS.keys()
+
+
+@pytest.mark.parametrize("name", QUERY_ARGS)
+def test_query_uses_indexes(plans: tuple[dict[str, dict[str, Any]], set[str]], name: str) -> None:
+    query_plans, partial_indexes = plans
+    scans = full_scans(query_plans[name], partial_indexes)
+    assert not scans, f"{name} reads whole tables: {', '.join(scans)}\n{json.dumps(query_plans[name], indent=2)}"